@@ -0,0 +1,173 @@
+# ai_schema.py
+import os
+import re
+import json
+import hashlib
+import logging
+
+from sqlalchemy import text
+
+from migrations import MIGRATIONS
+
+# ✅ What the SQL agent is allowed to see. Auth tables, file paths and contact
+# details never reach the prompt. Override with AI_SCHEMA_CONFIG=/path/to/config.json
+# (same shape as below).
+DEFAULT_SCHEMA_CONFIG = {
+    "companies": {
+        "description": "Placement drives. One row per company; package is the CTC offered.",
+        "columns": ["id", "name", "job_type", "job_description", "package",
+                    "drive_date", "location", "selection_process", "eligibility"],
+        "keywords": ["compan", "drive", "job", "role", "package", "ctc", "salary", "lpa",
+                     "location", "offer", "sde", "intern", "hiring", "recruit", "upcoming"],
+    },
+    "applications": {
+        "description": "One row per (student, company). eligible / applied are 'Yes' or 'No'. "
+                       "Join companies on company_id and students on student_id.",
+        "columns": ["id", "student_id", "company_id", "company_name", "registration_number",
+                    "student_name", "eligible", "applied"],
+        "keywords": ["eligib", "appl", "registered", "how many", "count", "number of"],
+    },
+    "students": {
+        "description": "Students in the placement cell.",
+        "columns": ["id", "registration_number", "name", "course", "cgpa", "backlogs",
+                    "section", "specialization"],
+        "keywords": ["student", "cgpa", "gpa", "backlog", "section", "specialization", "branch",
+                     "course", "batch"],
+    },
+    "company_rounds": {
+        "description": "Selection process of each company, one row per round in order.",
+        "columns": ["company_id", "round_number", "round_name"],
+        "keywords": ["round", "selection process", "interview", "aptitude", "test"],
+    },
+    "company_shortlist": {
+        "description": "Round results uploaded per company; status is 'Passed' or 'Failed'.",
+        "columns": ["company_id", "round_number", "registration_number", "student_name",
+                    "branch", "status"],
+        "keywords": ["round", "shortlist", "selected", "cleared", "passed", "failed", "result"],
+    },
+}
+
+# tables pulled in whenever the question matches nothing more specific
+DEFAULT_TABLES = ("companies", "applications")
+
+# a table that needs another one to be joined meaningfully
+TABLE_DEPENDENCIES = {
+    "applications": ("companies",),
+    "company_rounds": ("companies",),
+    "company_shortlist": ("companies",),
+}
+
+SCHEMA_CACHE_PATH = os.getenv(
+    "AI_SCHEMA_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ai_schema.json"),
+)
+
+_SNAPSHOT = None
+
+
+def load_config():
+    path = os.getenv("AI_SCHEMA_CONFIG")
+    if path:
+        with open(path) as f:
+            return json.load(f)
+    return DEFAULT_SCHEMA_CONFIG
+
+
+def _fingerprint(config):
+    """Changes when the allow-list or the schema version (latest migration) changes."""
+    raw = json.dumps({"config": config, "schema_version": MIGRATIONS[-1][0]}, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def build_snapshot(engine, config):
+    """
+    One information_schema query for the allow-listed columns, rendered as compact
+    CREATE TABLE text with the table description as a comment.
+    """
+    tables = list(config)
+    params = {f"t{i}": t for i, t in enumerate(tables)}
+    in_list = ", ".join(f":t{i}" for i in range(len(tables)))
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, COLUMN_KEY
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({in_list})
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """), params).fetchall()
+
+    columns = {}
+    for table, column, column_type, key in rows:
+        if column in config[table]["columns"]:
+            suffix = " PRIMARY KEY" if key == "PRI" else ""
+            columns.setdefault(table, []).append(f"  {column} {column_type}{suffix}")
+
+    snapshot = {}
+    for table in tables:
+        if table not in columns:
+            logging.warning(f"AI schema: table {table} not found, skipped")
+            continue
+        snapshot[table] = (
+            f"-- {config[table]['description']}\n"
+            f"CREATE TABLE {table} (\n" + ",\n".join(columns[table]) + "\n)"
+        )
+    return snapshot
+
+
+def get_snapshot(engine):
+    """
+    {table: schema text}, built once per deploy: read from the disk cache when its
+    fingerprint matches, otherwise rebuilt from information_schema and written back.
+    """
+    global _SNAPSHOT
+    if _SNAPSHOT is not None:
+        return _SNAPSHOT
+
+    config = load_config()
+    fingerprint = _fingerprint(config)
+    try:
+        with open(SCHEMA_CACHE_PATH) as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            _SNAPSHOT = cached["tables"]
+            return _SNAPSHOT
+    except (OSError, ValueError):
+        pass
+
+    _SNAPSHOT = build_snapshot(engine, config)
+    try:
+        os.makedirs(os.path.dirname(SCHEMA_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{SCHEMA_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fingerprint": fingerprint, "tables": _SNAPSHOT}, f, indent=1)
+        os.replace(tmp_path, SCHEMA_CACHE_PATH)      # workers never see a half-written file
+    except OSError as e:
+        logging.warning(f"AI schema: could not write cache {SCHEMA_CACHE_PATH}: {e}")
+    return _SNAPSHOT
+
+
+def clear_snapshot():
+    """Drop the in-process and on-disk snapshot (e.g. after a schema change)."""
+    global _SNAPSHOT
+    _SNAPSHOT = None
+    if os.path.exists(SCHEMA_CACHE_PATH):
+        os.remove(SCHEMA_CACHE_PATH)
+
+
+def select_tables(question, config=None):
+    """Allow-listed tables whose keywords appear in the question (plus join partners)."""
+    config = config or load_config()
+    q = question.lower()
+    selected = [t for t, spec in config.items()
+                if any(re.search(r"\b" + re.escape(k), q) for k in spec.get("keywords", []))]
+    if not selected:
+        selected = [t for t in DEFAULT_TABLES if t in config]
+    for table in list(selected):
+        for dep in TABLE_DEPENDENCIES.get(table, ()):
+            if dep in config and dep not in selected:
+                selected.append(dep)
+    return tuple(sorted(selected))
+
+
+def schema_context(engine, tables):
+    snapshot = get_snapshot(engine)
+    return "\n\n".join(snapshot[t] for t in tables if t in snapshot)
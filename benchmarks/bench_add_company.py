@@ -0,0 +1,99 @@
+"""
+Add-company latency vs. student count.
+
+Compares the old per-student INSERT loop with the single INSERT ... SELECT
+fan-out used by admin_add_company.
+
+Run against a SCRATCH database (tables are dropped and re-created):
+
+    BENCH_DB_NAME=tnp_bench python benchmarks/bench_add_company.py 1000 5000 20000
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("BENCH_DB_NAME"):
+    sys.exit("Set BENCH_DB_NAME to a scratch database (its tables will be dropped).")
+os.environ["DB_NAME"] = os.environ["BENCH_DB_NAME"]
+
+import db_connection as db                  # noqa: E402
+from utils import add_company_to_applications  # noqa: E402
+
+
+def setup(cursor, n_students):
+    for table in ("applications", "company_stats", "students", "companies"):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute("""
+        CREATE TABLE students (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            registration_number VARCHAR(50) UNIQUE,
+            name VARCHAR(255), cgpa DECIMAL(4,2), backlogs INT,
+            section VARCHAR(20), specialization VARCHAR(100)
+        )
+    """)
+    cursor.execute("CREATE TABLE companies (id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255))")
+    cursor.execute("""
+        CREATE TABLE company_stats (
+            company_id INT PRIMARY KEY, total_applications INT NOT NULL DEFAULT 0,
+            total_eligible INT NOT NULL DEFAULT 0, total_applied INT NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE applications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            student_id INT, company_id INT,
+            registration_number VARCHAR(50), student_name VARCHAR(255),
+            cgpa DECIMAL(4,2), backlogs INT, company_name VARCHAR(255),
+            section VARCHAR(20), specialization VARCHAR(100),
+            eligible VARCHAR(5) DEFAULT 'No', applied VARCHAR(5) DEFAULT 'No'
+        )
+    """)
+    rows = [(f"REG{i:06d}", f"Student {i}", 6 + (i % 40) / 10, i % 3, f"S{i % 10}", "CSE")
+            for i in range(n_students)]
+    cursor.executemany("""
+        INSERT INTO students (registration_number, name, cgpa, backlogs, section, specialization)
+        VALUES (%s,%s,%s,%s,%s,%s)
+    """, rows)
+
+
+def old_fanout(cursor, company_name):
+    cursor.execute("""
+        SELECT registration_number, name, cgpa, backlogs, section, specialization
+        FROM students
+    """)
+    for reg_no, student_name, cgpa, backlogs, section, specialization in cursor.fetchall():
+        cursor.execute("""
+            INSERT INTO applications
+            (registration_number, student_name, cgpa, backlogs,
+             company_name, section, specialization, eligible, applied)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,'No','No')
+        """, (reg_no, student_name, cgpa, backlogs, company_name, section, specialization))
+
+
+def new_fanout(cursor, company_name):
+    cursor.execute("INSERT INTO companies (name) VALUES (%s)", (company_name,))
+    add_company_to_applications(cursor, cursor.lastrowid, company_name)
+
+
+def timed(fn, conn, cursor, company_name):
+    conn.start_transaction()
+    started = time.perf_counter()
+    fn(cursor, company_name)
+    conn.commit()
+    return time.perf_counter() - started
+
+
+def main(sizes):
+    print(f"{'students':>10} {'per-row (s)':>12} {'set-based (s)':>14} {'speedup':>8}")
+    with db.cursor(dictionary=False) as (cursor, conn):
+        for n in sizes:
+            setup(cursor, n)
+            old = timed(old_fanout, conn, cursor, "Old Co")
+            new = timed(new_fanout, conn, cursor, "New Co")
+            print(f"{n:>10} {old:>12.3f} {new:>14.3f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 5000, 20000])
@@ -0,0 +1,54 @@
+"""
+AI answer latency: fast-path SQL templates vs. the LangChain SQL agent.
+
+Read-only; runs against the configured DB_* database:
+
+    python benchmarks/bench_ai_fast_path.py            # fast path only
+    python benchmarks/bench_ai_fast_path.py --agent    # also time the agent (needs GROQ_API_KEY)
+"""
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portal_ai import AI, fast_answer  # noqa: E402
+
+REPEAT = 50
+
+QUESTIONS = [
+    "Which companies offer SDE roles?",
+    "Companies with package above 10 LPA",
+    "How many students are eligible for Google?",
+    "How many students applied to Amazon?",
+    "Upcoming drives",
+    "Who is the placement coordinator?",      # no template: agent only
+]
+
+
+def main(run_agent):
+    print(f"{'question':<45} {'fast p50 (ms)':>14} {'fast p95 (ms)':>14} {'agent (s)':>10}")
+    for q in QUESTIONS:
+        times = []
+        matched = True
+        for _ in range(REPEAT):
+            started = time.perf_counter()
+            matched = fast_answer(q) is not None
+            times.append((time.perf_counter() - started) * 1000)
+        times.sort()
+        p50 = statistics.median(times)
+        p95 = times[int(len(times) * 0.95) - 1]
+
+        agent = ""
+        if run_agent:
+            started = time.perf_counter()
+            AI(q)._ask_agent()
+            agent = f"{time.perf_counter() - started:.2f}"
+
+        fast = (f"{p50:>14.2f} {p95:>14.2f}" if matched else f"{'(no match)':>14} {'':>14}")
+        print(f"{q:<45} {fast} {agent:>10}")
+
+
+if __name__ == "__main__":
+    main("--agent" in sys.argv)
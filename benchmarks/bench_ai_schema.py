@@ -0,0 +1,81 @@
+"""
+Schema context size for the SQL agent: full SQLDatabase reflection vs. the
+pruned ai_schema snapshot selected per question.
+
+Read-only; runs against the configured DB_* database:
+
+    python benchmarks/bench_ai_schema.py
+    python benchmarks/bench_ai_schema.py --agent    # also time both agents (needs GROQ_API_KEY)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.utilities import SQLDatabase  # noqa: E402
+from langchain_community.agent_toolkits import create_sql_agent  # noqa: E402
+
+import ai_schema  # noqa: E402
+from portal_ai import get_engine, get_llm, get_agent  # noqa: E402
+
+QUESTIONS = [
+    "Which companies offer SDE roles?",
+    "How many students are eligible for Google?",
+    "List upcoming drives with package above 10 LPA",
+    "Which students cleared round 2 of Amazon?",
+    "How many students in section S1 have backlogs?",
+]
+
+
+def approx_tokens(s):
+    return len(s) // 4
+
+
+def main(run_agent):
+    engine = get_engine()
+
+    started = time.perf_counter()
+    full_db = SQLDatabase(engine)
+    full_info = full_db.get_table_info()
+    full_build = time.perf_counter() - started
+
+    ai_schema.clear_snapshot()
+    started = time.perf_counter()
+    ai_schema.get_snapshot(engine)
+    cold = time.perf_counter() - started
+    ai_schema._SNAPSHOT = None
+    started = time.perf_counter()
+    ai_schema.get_snapshot(engine)
+    warm = time.perf_counter() - started
+
+    print(f"full reflection    : {full_build * 1000:8.1f} ms, ~{approx_tokens(full_info)} tokens "
+          f"({len(full_db.get_usable_table_names())} tables)")
+    print(f"snapshot (cold)    : {cold * 1000:8.1f} ms")
+    print(f"snapshot (disk)    : {warm * 1000:8.1f} ms")
+    print()
+    print(f"{'question':<50} {'tables':<40} {'tokens':>7}")
+    for q in QUESTIONS:
+        tables = ai_schema.select_tables(q)
+        context = ai_schema.schema_context(engine, tables)
+        print(f"{q:<50} {','.join(tables):<40} {approx_tokens(context):>7}")
+
+    if run_agent:
+        full_agent = create_sql_agent(llm=get_llm(), db=full_db, handle_parsing_errors=True)
+        print()
+        print(f"{'question':<50} {'full (s)':>9} {'pruned (s)':>11}")
+        for q in QUESTIONS:
+            started = time.perf_counter()
+            full_agent.invoke({"input": q})
+            full_t = time.perf_counter() - started
+
+            tables = ai_schema.select_tables(q)
+            prompt = f"{ai_schema.schema_context(engine, tables)}\n\nQuestion: {q}"
+            started = time.perf_counter()
+            get_agent(tables).invoke({"input": prompt})
+            pruned_t = time.perf_counter() - started
+            print(f"{q:<50} {full_t:>9.2f} {pruned_t:>11.2f}")
+
+
+if __name__ == "__main__":
+    main("--agent" in sys.argv)
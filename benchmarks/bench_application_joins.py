@@ -0,0 +1,132 @@
+"""
+applications join timings: company_name / registration_number strings vs.
+company_id / student_id integer keys.
+
+Times the queries behind student_companies, tutor_company_status and
+set_eligibility both ways on the same seeded data.
+
+Run against a SCRATCH database (tables are dropped and re-created):
+
+    BENCH_DB_NAME=tnp_bench python benchmarks/bench_application_joins.py 5000 150
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("BENCH_DB_NAME"):
+    sys.exit("Set BENCH_DB_NAME to a scratch database (its tables will be dropped).")
+os.environ["DB_NAME"] = os.environ["BENCH_DB_NAME"]
+
+import db_connection as db  # noqa: E402
+
+REPEAT = 20
+
+# (label, string-key query, integer-key query, params(student_id, reg_no, company_id, company_name))
+QUERIES = [
+    (
+        "student_companies",
+        """SELECT c.id, c.name, a.eligible, a.applied FROM applications a
+           JOIN companies c ON a.company_name = c.name WHERE a.registration_number = %s""",
+        """SELECT c.id, c.name, a.eligible, a.applied FROM applications a
+           JOIN companies c ON a.company_id = c.id WHERE a.student_id = %s""",
+        lambda sid, reg, cid, cname: ((reg,), (sid,)),
+    ),
+    (
+        "tutor_company_status",
+        """SELECT s.id, COALESCE(a.applied, 'No'), COALESCE(a.eligible, 'No') FROM students s
+           LEFT JOIN applications a ON a.registration_number = s.registration_number AND a.company_name = %s
+           WHERE s.section = %s AND s.specialization = %s""",
+        """SELECT s.id, COALESCE(a.applied, 'No'), COALESCE(a.eligible, 'No') FROM students s
+           LEFT JOIN applications a ON a.student_id = s.id AND a.company_id = %s
+           WHERE s.section = %s AND s.specialization = %s""",
+        lambda sid, reg, cid, cname: ((cname, "S1", "CSE"), (cid, "S1", "CSE")),
+    ),
+    (
+        "set_eligibility",
+        """UPDATE applications a JOIN students s ON a.registration_number = s.registration_number
+           SET a.eligible = CASE WHEN s.cgpa >= 7 AND s.backlogs <= 0 THEN 'Yes' ELSE 'No' END
+           WHERE a.company_name = %s""",
+        """UPDATE applications a JOIN students s ON a.student_id = s.id
+           SET a.eligible = CASE WHEN s.cgpa >= 7 AND s.backlogs <= 0 THEN 'Yes' ELSE 'No' END
+           WHERE a.company_id = %s""",
+        lambda sid, reg, cid, cname: ((cname,), (cid,)),
+    ),
+]
+
+
+def setup(cursor, n_students, n_companies):
+    for table in ("applications", "students", "companies"):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute("""
+        CREATE TABLE students (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            registration_number VARCHAR(50), name VARCHAR(255),
+            cgpa DECIMAL(4,2), backlogs INT, section VARCHAR(20), specialization VARCHAR(100),
+            INDEX idx_students_registration_number (registration_number)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE companies (
+            id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255),
+            INDEX idx_companies_name (name)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE applications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            student_id INT, company_id INT,
+            registration_number VARCHAR(50), company_name VARCHAR(255),
+            eligible VARCHAR(5) DEFAULT 'No', applied VARCHAR(5) DEFAULT 'No',
+            INDEX idx_app_company_name_reg (company_name, registration_number),
+            INDEX idx_app_reg (registration_number),
+            INDEX idx_applications_company_student (company_id, student_id),
+            INDEX idx_applications_student (student_id)
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO students (registration_number, name, cgpa, backlogs, section, specialization)
+        VALUES (%s,%s,%s,%s,%s,%s)
+    """, [(f"REG{i:06d}", f"Student {i}", 6 + (i % 40) / 10, i % 3, f"S{i % 10}", "CSE")
+          for i in range(n_students)])
+    cursor.executemany("INSERT INTO companies (name) VALUES (%s)",
+                       [(f"Company {i}",) for i in range(n_companies)])
+    cursor.execute("""
+        INSERT INTO applications (student_id, company_id, registration_number, company_name)
+        SELECT s.id, c.id, s.registration_number, c.name FROM students s CROSS JOIN companies c
+    """)
+    cursor.execute("ANALYZE TABLE students, companies, applications")
+    cursor.fetchall()
+
+
+def timed(cursor, sql, params):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        cursor.execute(sql, params)
+        if cursor.with_rows:
+            cursor.fetchall()
+    return (time.perf_counter() - started) / REPEAT * 1000
+
+
+def main(n_students, n_companies):
+    with db.cursor(dictionary=False) as (cursor, conn):
+        setup(cursor, n_students, n_companies)
+        cursor.execute("SELECT id, registration_number FROM students ORDER BY id LIMIT 1 OFFSET %s",
+                       (n_students // 2,))
+        sid, reg = cursor.fetchone()
+        cursor.execute("SELECT id, name FROM companies ORDER BY id LIMIT 1 OFFSET %s", (n_companies // 2,))
+        cid, cname = cursor.fetchone()
+
+        print(f"{n_students} students x {n_companies} companies, mean of {REPEAT} runs")
+        print(f"{'query':<22} {'strings (ms)':>13} {'ints (ms)':>10} {'speedup':>8}")
+        for label, string_sql, int_sql, params in QUERIES:
+            string_params, int_params = params(sid, reg, cid, cname)
+            before = timed(cursor, string_sql, string_params)
+            after = timed(cursor, int_sql, int_params)
+            print(f"{label:<22} {before:>13.2f} {after:>10.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(args[0] if args else 5000, args[1] if len(args) > 1 else 150)
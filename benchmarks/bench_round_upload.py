@@ -0,0 +1,98 @@
+"""
+Round-result replacement for a 5k-row result sheet.
+
+Compares the old path (DELETE + one INSERT per df.iterrows() row) with
+utils.import_round_results (batched load into staging + atomic swap).
+
+Run against a SCRATCH database (tables are dropped and re-created):
+
+    BENCH_DB_NAME=tnp_bench python benchmarks/bench_round_upload.py 5000
+"""
+import os
+import sys
+import time
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("BENCH_DB_NAME"):
+    sys.exit("Set BENCH_DB_NAME to a scratch database (its tables will be dropped).")
+os.environ["DB_NAME"] = os.environ["BENCH_DB_NAME"]
+
+import db_connection as db              # noqa: E402
+from utils import import_round_results  # noqa: E402
+
+
+def setup(cursor):
+    for table in ("company_shortlist_staging", "company_shortlist", "companies"):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute("CREATE TABLE companies (id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255) NOT NULL)")
+    cursor.execute("INSERT INTO companies (name) VALUES ('Bench Co')")
+    cursor.execute("""
+        CREATE TABLE company_shortlist (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            company_id INT NOT NULL, round_number INT NOT NULL,
+            registration_number VARCHAR(50) NOT NULL, student_name VARCHAR(255),
+            email VARCHAR(255), branch VARCHAR(50), year VARCHAR(20),
+            status ENUM('Passed','Failed') DEFAULT 'Passed',
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uniq_student_round (company_id, round_number, registration_number),
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE company_shortlist_staging (
+            id INT AUTO_INCREMENT PRIMARY KEY, load_id CHAR(32) NOT NULL,
+            company_id INT NOT NULL, round_number INT NOT NULL,
+            registration_number VARCHAR(50) NOT NULL, student_name VARCHAR(255),
+            email VARCHAR(255), branch VARCHAR(50), year VARCHAR(20),
+            status ENUM('Passed','Failed') DEFAULT 'Passed',
+            KEY idx_staging_load (load_id)
+        )
+    """)
+
+
+def old_upload(cursor, conn, df, company_id, round_number):
+    cursor.execute("DELETE FROM company_shortlist WHERE company_id=%s AND round_number=%s",
+                   (company_id, round_number))
+    for _, row in df.iterrows():
+        cursor.execute("""
+            INSERT INTO company_shortlist
+            (company_id, round_number, registration_number,
+             student_name, email, branch, year, status)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+        """, (company_id, round_number, str(row['registration_number']).strip(),
+              row['student_name'], row['email'], row['branch'], row['year'], 'Passed'))
+    conn.commit()
+
+
+def main(n_rows):
+    df = pd.DataFrame({
+        "registration_number": [f"REG{i:06d}" for i in range(n_rows)],
+        "student_name": [f"Student {i}" for i in range(n_rows)],
+        "email": [f"s{i}@example.edu" for i in range(n_rows)],
+        "branch": ["CSE"] * n_rows,
+        "year": ["4"] * n_rows,
+    })
+    path = os.path.join(tempfile.mkdtemp(), "round.csv")
+    df.to_csv(path, index=False)
+
+    with db.cursor(dictionary=False) as (cursor, conn):
+        setup(cursor)
+        cursor.execute("SELECT id FROM companies")
+        company_id = cursor.fetchone()[0]
+
+        started = time.perf_counter()
+        old_upload(cursor, conn, df, company_id, 1)
+        print(f"{n_rows} rows  per-row insert   : {time.perf_counter() - started:7.2f}s")
+
+    started = time.perf_counter()
+    result = import_round_results(path, company_id, 1)
+    print(f"{n_rows} rows  staging + swap   : {time.perf_counter() - started:7.2f}s "
+          f"(inserted {result['inserted']})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
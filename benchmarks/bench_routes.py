@@ -0,0 +1,364 @@
+"""
+Route-level latency and query counts for the portal's hot pages.
+
+Seeds a SCRATCH database at a configurable scale (students x companies with the
+full applications fan-out and company_shortlist rounds), applies the schema
+migrations, then drives the Flask test client through the hot routes and prints
+p50 / p95 latency and queries per request. Results can be saved as a named
+baseline and compared against on a later commit.
+
+Run against a SCRATCH database (tables are dropped and re-created):
+
+    BENCH_DB_NAME=tnp_bench python benchmarks/bench_routes.py --students 50000 --companies 300
+    BENCH_DB_NAME=tnp_bench python benchmarks/bench_routes.py --no-seed --save before
+    BENCH_DB_NAME=tnp_bench python benchmarks/bench_routes.py --no-seed --compare before
+
+Query counts come from the server's `Questions` counter, so run it against an
+otherwise idle server. upload_students times only the enqueue, but its query
+count covers the whole background import (waited for before the next request).
+"""
+import io
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import subprocess
+import statistics
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("BENCH_DB_NAME"):
+    sys.exit("Set BENCH_DB_NAME to a scratch database (its tables will be dropped).")
+os.environ["DB_NAME"] = os.environ["BENCH_DB_NAME"]
+os.environ.pop("DB_REPLICA_URL", None)          # every read hits the seeded primary
+
+import mysql.connector                          # noqa: E402
+import db_connection as db                      # noqa: E402
+import migrations                               # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+TUTOR_EMAIL = "tutor@bench.local"
+ADMIN_EMAIL = "admin@bench.local"
+SECTIONS = 10
+ROUNDS = ("Aptitude", "Technical Interview", "HR Interview")
+
+TABLES = ("round_file_rows", "company_rounds", "company_shortlist", "company_shortlist_staging", "uploaded_round_files",
+          "company_stats", "applications", "upload_jobs", "student_auth", "students", "tutors",
+          "companies", "data_version", "schema_migrations")
+
+
+# ----- seeding -----
+def seed(cursor, n_students, n_companies, shortlist_every):
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+    cursor.execute("""
+        CREATE TABLE students (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            registration_number VARCHAR(50) UNIQUE, name VARCHAR(255), email VARCHAR(255),
+            phone VARCHAR(20), course VARCHAR(100), section VARCHAR(20), specialization VARCHAR(100),
+            semester VARCHAR(20), backlogs INT, status VARCHAR(50), cgpa DECIMAL(4,2),
+            roll_no VARCHAR(50), department VARCHAR(100), marks_10th DECIMAL(5,2),
+            marks_12th DECIMAL(5,2), current_stage VARCHAR(100)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE companies (
+            id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255) NOT NULL,
+            job_description TEXT, job_type VARCHAR(100), package VARCHAR(50), drive_date DATE,
+            location VARCHAR(255), selection_process TEXT, nomination_form VARCHAR(500),
+            eligibility TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE applications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            student_id INT, company_id INT,
+            registration_number VARCHAR(50), student_name VARCHAR(255),
+            cgpa DECIMAL(4,2), backlogs INT, company_name VARCHAR(255),
+            section VARCHAR(20), specialization VARCHAR(100),
+            eligible VARCHAR(5) DEFAULT 'No', applied VARCHAR(5) DEFAULT 'No'
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE tutors (
+            id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255), email VARCHAR(255),
+            password VARCHAR(255), section VARCHAR(20), specialization VARCHAR(100)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE student_auth (
+            id INT AUTO_INCREMENT PRIMARY KEY, email VARCHAR(255), password VARCHAR(255)
+        )
+    """)
+
+    for start in range(0, n_students, 5000):
+        cursor.executemany("""
+            INSERT INTO students (registration_number, name, email, section, specialization,
+                                  cgpa, backlogs, course, status)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,'B.Tech','Active')
+        """, [(f"REG{i:06d}", f"Student {i}", f"student{i}@bench.local", f"S{i % SECTIONS}", "CSE",
+               6 + (i % 40) / 10, i % 3) for i in range(start, min(start + 5000, n_students))])
+
+    today = date.today()
+    cursor.executemany("""
+        INSERT INTO companies (name, job_description, job_type, package, drive_date, location,
+                               selection_process, eligibility)
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+    """, [(f"Company {i}", f"Hiring for role {i % 7} with Python and SQL", ("SDE", "Data Science",
+           "Full Stack Developer")[i % 3], f"{4 + i % 20} LPA", today + timedelta(days=i % 90 - 30),
+           "Bengaluru", json.dumps(ROUNDS), json.dumps({"cgpa": 7, "backlogs": 0}))
+          for i in range(n_companies)])
+    cursor.execute("INSERT INTO tutors (name, email, section, specialization) VALUES (%s,%s,'S1','CSE')",
+                   ("Bench Tutor", TUTOR_EMAIL))
+
+    # full fan-out, a few companies per statement so no single transaction is huge
+    cursor.execute("SELECT id FROM companies ORDER BY id")
+    company_ids = [r[0] for r in cursor.fetchall()]
+    for i in range(0, len(company_ids), 10):
+        chunk = company_ids[i:i + 10]
+        cursor.execute(f"""
+            INSERT INTO applications
+            (student_id, company_id, registration_number, student_name, cgpa, backlogs,
+             company_name, section, specialization, eligible, applied)
+            SELECT s.id, c.id, s.registration_number, s.name, s.cgpa, s.backlogs,
+                   c.name, s.section, s.specialization,
+                   IF(s.cgpa >= 7 AND s.backlogs = 0, 'Yes', 'No'),
+                   IF(MOD(s.id + c.id, 4) = 0, 'Yes', 'No')
+            FROM students s CROSS JOIN companies c
+            WHERE c.id IN ({", ".join(["%s"] * len(chunk))})
+        """, chunk)
+
+    # migrations create the helper tables (company_shortlist, company_stats, company_rounds, ...)
+    applied = migrations.run_migrations()
+    print(f"Applied migrations {applied}")
+
+    for round_number in range(1, len(ROUNDS) + 1):
+        every = shortlist_every * round_number          # fewer students survive later rounds
+        cursor.execute("""
+            INSERT INTO company_shortlist
+            (company_id, round_number, registration_number, student_name, branch, status)
+            SELECT c.id, %s, s.registration_number, s.name, s.specialization, 'Passed'
+            FROM students s CROSS JOIN companies c
+            WHERE MOD(s.id, %s) = 0
+        """, (round_number, every))
+
+    cursor.execute("ANALYZE TABLE students, companies, applications, company_shortlist")
+    cursor.fetchall()
+
+
+# ----- measuring -----
+class QueryCounter:
+    """Statements the server executed between two calls, from a side connection."""
+
+    def __init__(self):
+        self.conn = mysql.connector.connect(**db.DB_CONFIG)
+        self.cursor = self.conn.cursor()
+
+    def questions(self):
+        self.cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        return int(self.cursor.fetchone()[1])
+
+    def delta(self, before):
+        return self.questions() - before - 1      # minus the SHOW STATUS that took `before`
+
+
+def login(client, role, ids):
+    with client.session_transaction() as sess:
+        sess.clear()
+        if role == "admin":
+            sess["admin_email"] = ADMIN_EMAIL
+        elif role == "tutor":
+            sess["tutor_email"], sess["tutor_id"] = TUTOR_EMAIL, ids["tutor_id"]
+        elif role == "student":
+            sess["student_email"], sess["student_reg"] = ids["student_email"], ids["student_reg"]
+            sess["student_id"] = ids["student_id"]
+
+
+def students_csv(n, offset):
+    from utils import STUDENT_HEADERS
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(STUDENT_HEADERS)
+    for i in range(offset, offset + n):
+        row = {"registration_number": f"NEW{i:07d}", "name": f"New Student {i}",
+               "email": f"new{i}@bench.local", "section": "S1", "specialization": "CSE",
+               "cgpa": 7.5, "backlogs": 0, "course": "B.Tech"}
+        writer.writerow([row.get(h, "") for h in STUDENT_HEADERS])
+    return io.BytesIO(out.getvalue().encode())
+
+
+def routes(ids, upload_rows):
+    """(label, role, method, path, form data factory(i)) for each hot route."""
+    return [
+        ("home", None, "GET", "/", None),
+        ("admin_dashboard", "admin", "GET", "/admin/dashboard", None),
+        ("student_companies", "student", "GET", "/student/companies", None),
+        ("tutor_company_status", "tutor", "GET", f"/tutor/company/{ids['company_id']}", None),
+        ("admin_add_company", "admin", "POST", "/admin/add-company",
+         lambda i: {"name": f"Bench Company {time.time_ns()}-{i}", "job_type": "SDE",
+                    "package": "10 LPA", "location": "Pune", "drive_date": date.today().isoformat(),
+                    "job_description": "Benchmark drive", "selection_process[]": list(ROUNDS)}),
+        ("upload_students", "admin", "POST", "/admin/upload-students",
+         lambda i: {"file": (students_csv(upload_rows, (time.time_ns() % 10**6) * 100 + i * upload_rows),
+                             "students.csv")}),
+    ]
+
+
+def wait_for_jobs(timeout=600):
+    """
+    Block until no upload job is queued or running (their queries would skew later counts).
+    Returns the number of polling queries issued, so callers can subtract them.
+    """
+    deadline, polls = time.monotonic() + timeout, 0
+    while time.monotonic() < deadline:
+        with db.cursor(dictionary=False) as (cursor, conn):
+            cursor.execute("SELECT COUNT(*) FROM upload_jobs WHERE status IN ('queued', 'running')")
+            polls += 1
+            if cursor.fetchone()[0] == 0:
+                break
+        time.sleep(0.5)
+    return polls
+
+
+def percentile(times, pct):
+    times = sorted(times)
+    return times[max(0, min(len(times) - 1, int(round(len(times) * pct)) - 1))]
+
+
+def run(repeat, write_repeat, cold, upload_rows, only):
+    from main import app
+    from utils import STATS_CACHE, invalidate_profile
+
+    with db.cursor(dictionary=False) as (cursor, conn):
+        cursor.execute("SELECT id FROM tutors WHERE email=%s", (TUTOR_EMAIL,))
+        tutor_id = cursor.fetchone()[0]
+        cursor.execute("SELECT id, registration_number, email FROM students "
+                       "WHERE section='S1' ORDER BY id LIMIT 1")
+        student_id, student_reg, student_email = cursor.fetchone()
+        cursor.execute("SELECT id FROM companies ORDER BY id LIMIT 1")
+        company_id = cursor.fetchone()[0]
+    ids = {"tutor_id": tutor_id, "student_id": student_id, "student_reg": student_reg,
+           "student_email": student_email, "company_id": company_id}
+
+    app.config["TESTING"] = True
+    client = app.test_client()
+    counter = QueryCounter()
+    results = {}
+    for label, role, method, path, data in routes(ids, upload_rows):
+        if only and label not in only:
+            continue
+        login(client, role, ids)
+        n = write_repeat if method == "POST" else repeat
+        times, queries = [], []
+        for i in range(n):
+            if cold:
+                STATS_CACHE.clear()
+                invalidate_profile()
+            before = counter.questions()
+            started = time.perf_counter()
+            if method == "GET":
+                response = client.get(path)
+            else:
+                response = client.post(path, data=data(i), content_type="multipart/form-data")
+            times.append((time.perf_counter() - started) * 1000)
+            polls = wait_for_jobs() if label == "upload_students" else 0
+            queries.append(counter.delta(before) - polls)
+            if response.status_code >= 400:
+                print(f"  ! {label}: HTTP {response.status_code}")
+        results[label] = {
+            "requests": n,
+            "p50_ms": round(statistics.median(times), 2),
+            "p95_ms": round(percentile(times, 0.95), 2),
+            "queries": round(statistics.median(queries), 1),
+        }
+    return results
+
+
+# ----- baselines -----
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scale(cursor):
+    counts = {}
+    for table in ("students", "companies", "applications", "company_shortlist"):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+def print_results(results, baseline=None):
+    base = (baseline or {}).get("routes", {})
+    header = f"{'route':<22} {'n':>4} {'p50 (ms)':>10} {'p95 (ms)':>10} {'queries':>8}"
+    if base:
+        header += f" {'p50 vs base':>12} {'queries vs base':>16}"
+    print(header)
+    for label, r in results.items():
+        line = f"{label:<22} {r['requests']:>4} {r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['queries']:>8}"
+        if label in base:
+            b = base[label]
+            ratio = r['p50_ms'] / b['p50_ms'] if b['p50_ms'] else float("inf")
+            line += f" {ratio:>11.2f}x {r['queries'] - b['queries']:>+16}"
+        print(line)
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--companies", type=int, default=300)
+    parser.add_argument("--shortlist-every", type=int, default=10,
+                        help="every Nth student passes round 1 (2N round 2, ...)")
+    parser.add_argument("--no-seed", action="store_true", help="reuse the data already in BENCH_DB_NAME")
+    parser.add_argument("--repeat", type=int, default=30, help="requests per read route")
+    parser.add_argument("--write-repeat", type=int, default=5, help="requests per write route")
+    parser.add_argument("--upload-rows", type=int, default=500, help="rows per upload_students file")
+    parser.add_argument("--cold", action="store_true", help="clear in-process caches before every request")
+    parser.add_argument("--route", action="append", help="only run this route (repeatable)")
+    parser.add_argument("--save", metavar="NAME", help=f"save results to {BASELINE_DIR}/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with a saved baseline")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+
+    with db.cursor(dictionary=False) as (cursor, conn):
+        if not args.no_seed:
+            started = time.perf_counter()
+            seed(cursor, args.students, args.companies, args.shortlist_every)
+            print(f"Seeded in {time.perf_counter() - started:.1f}s")
+        counts = scale(cursor)
+    print(", ".join(f"{v} {k}" for k, v in counts.items()) + (" (cold caches)" if args.cold else ""))
+
+    results = run(args.repeat, args.write_repeat, args.cold, args.upload_rows, args.route)
+    if baseline:
+        print(f"Compared with baseline '{args.compare}' (commit {baseline.get('commit')}, "
+              f"scale {baseline.get('scale')})")
+    print_results(results, baseline)
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save), "w") as f:
+            json.dump({"commit": git_commit(), "scale": counts, "cold": args.cold,
+                       "routes": results}, f, indent=1)
+        print(f"Saved baseline {baseline_path(args.save)}")
+
+
+if __name__ == "__main__":
+    main()
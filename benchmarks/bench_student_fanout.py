@@ -0,0 +1,108 @@
+"""
+Application fan-out after a student import, at realistic cohort sizes.
+
+Compares the old nested loop (one INSERT IGNORE per student x company) with
+utils.add_students_to_applications (one INSERT ... SELECT per batch of
+registration numbers).
+
+Run against a SCRATCH database (tables are dropped and re-created):
+
+    BENCH_DB_NAME=tnp_bench python benchmarks/bench_student_fanout.py 5000 150
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("BENCH_DB_NAME"):
+    sys.exit("Set BENCH_DB_NAME to a scratch database (its tables will be dropped).")
+os.environ["DB_NAME"] = os.environ["BENCH_DB_NAME"]
+
+import db_connection as db                     # noqa: E402
+from utils import add_students_to_applications  # noqa: E402
+
+
+def setup(cursor, n_students, n_companies):
+    for table in ("applications", "company_stats", "students", "companies"):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute("""
+        CREATE TABLE students (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            registration_number VARCHAR(50) UNIQUE,
+            name VARCHAR(255), cgpa DECIMAL(4,2), backlogs INT,
+            section VARCHAR(20), specialization VARCHAR(100)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE companies (
+            id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255),
+            min_cgpa DECIMAL(4,2) NULL, max_backlogs INT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE company_stats (
+            company_id INT PRIMARY KEY, total_applications INT NOT NULL DEFAULT 0,
+            total_eligible INT NOT NULL DEFAULT 0, total_applied INT NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE applications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            student_id INT, company_id INT,
+            registration_number VARCHAR(50), student_name VARCHAR(255),
+            cgpa DECIMAL(4,2), backlogs INT, section VARCHAR(20),
+            specialization VARCHAR(100), company_name VARCHAR(255),
+            eligible VARCHAR(5) DEFAULT 'No', applied VARCHAR(5) DEFAULT 'No',
+            UNIQUE KEY uniq_app (registration_number, company_name),
+            UNIQUE KEY uniq_applications_company_student (company_id, student_id)
+        )
+    """)
+    # every other company has criteria, so both eligibility branches are exercised
+    cursor.executemany("INSERT INTO companies (name, min_cgpa, max_backlogs) VALUES (%s, %s, %s)",
+                       [(f"Company {i}", 7.5 if i % 2 else None, 1 if i % 2 else None)
+                        for i in range(n_companies)])
+    students = [(f"REG{i:06d}", f"Student {i}", 6 + (i % 40) / 10, i % 3, f"S{i % 10}", "CSE")
+                for i in range(n_students)]
+    cursor.executemany("""
+        INSERT INTO students (registration_number, name, cgpa, backlogs, section, specialization)
+        VALUES (%s,%s,%s,%s,%s,%s)
+    """, students)
+    return students
+
+
+def old_fanout(cursor, students):
+    cursor.execute("SELECT name FROM companies")
+    companies = cursor.fetchall()
+    for reg_no, name, cgpa, backlogs, section, specialization in students:
+        eligible = "Yes" if cgpa >= 7 and backlogs == 0 else "No"
+        for (company_name,) in companies:
+            cursor.execute("""
+                INSERT IGNORE INTO applications
+                (registration_number, student_name, cgpa, backlogs, section, specialization, company_name, eligible, applied)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (reg_no, name, cgpa, backlogs, section, specialization, company_name, eligible, "No"))
+
+
+def main(n_students, n_companies, skip_old=False):
+    with db.cursor(dictionary=False) as (cursor, conn):
+        students = setup(cursor, n_students, n_companies)
+        reg_nos = [s[0] for s in students]
+        print(f"{n_students} students x {n_companies} companies = {n_students * n_companies} rows")
+
+        if not skip_old:
+            started = time.perf_counter()
+            old_fanout(cursor, students)
+            print(f"  nested loop : {time.perf_counter() - started:8.2f}s")
+            cursor.execute("TRUNCATE TABLE applications")
+
+        started = time.perf_counter()
+        created = add_students_to_applications(reg_nos, cursor, conn=conn)
+        print(f"  set-based   : {time.perf_counter() - started:8.2f}s ({created} rows created)")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(int(args[0]) if args else 5000,
+         int(args[1]) if len(args) > 1 else 150,
+         skip_old="--skip-old" in sys.argv)
@@ -0,0 +1,102 @@
+# eligibility.py
+import json
+import logging
+
+import db_connection as db
+
+# ✅ Eligibility engine: applications.eligible is derived from the student's cgpa/backlogs
+# and the company's criteria (companies.min_cgpa / max_backlogs). Each scope is two
+# set-based statements: the company_stats deltas of the rows about to flip, then one
+# UPDATE ... JOIN that writes only those rows. Companies without criteria are left alone.
+BATCH_SIZE = 1000
+
+# Same rule as the original set_eligibility UPDATE (s.cgpa >= min AND s.backlogs <= max):
+# a student with no cgpa, or no backlogs figure when the company caps backlogs, is 'No'.
+# A company without a backlog limit (max_backlogs IS NULL) only checks cgpa.
+ELIGIBLE_SQL = """
+    CASE WHEN s.cgpa IS NOT NULL AND s.cgpa >= c.min_cgpa
+              AND (c.max_backlogs IS NULL OR (s.backlogs IS NOT NULL AND s.backlogs <= c.max_backlogs))
+         THEN 'Yes' ELSE 'No' END
+"""
+
+
+def parse_criteria(eligibility):
+    """(min_cgpa, max_backlogs) from a companies.eligibility JSON value; (None, None) if unset."""
+    try:
+        criteria = json.loads(eligibility) if isinstance(eligibility, str) else (eligibility or {})
+    except ValueError:
+        return None, None
+    if not isinstance(criteria, dict):
+        return None, None
+    try:
+        min_cgpa = float(criteria["cgpa"]) if criteria.get("cgpa") not in (None, "") else None
+        max_backlogs = int(criteria["backlogs"]) if criteria.get("backlogs") not in (None, "") else None
+    except (TypeError, ValueError):
+        return None, None
+    return min_cgpa, max_backlogs
+
+
+def _reevaluate(cursor, where, params):
+    """
+    Re-evaluate the applications matching `where` (over aliases a, s, c) and return the
+    number of rows written. A NULL flag counts as 'No' for company_stats, so only real
+    'Yes' <-> 'No' transitions move total_eligible (NULL -> 'No' is written, not counted).
+
+    Two statements per batch, on purpose: the deltas need the old flags, which the
+    UPDATE overwrites, and recounting the touched companies from applications instead
+    would scan every application of every company a student edit touches. Both run in
+    the caller's transaction; under InnoDB's default REPEATABLE READ the INSERT ...
+    SELECT share-locks the rows it reads, so nothing can change them before the UPDATE.
+    """
+    scope = f"""
+        FROM applications a
+        JOIN students s ON s.id = a.student_id
+        JOIN companies c ON c.id = a.company_id
+        WHERE ({where}) AND c.min_cgpa IS NOT NULL
+    """
+    # deltas first, from the old flags; the UPDATE below writes exactly those rows (plus NULL -> 'No')
+    cursor.execute(f"""
+        INSERT INTO company_stats (company_id, total_applications, total_eligible, total_applied)
+        SELECT a.company_id, 0, SUM(IF({ELIGIBLE_SQL} = 'Yes', 1, -1)), 0
+        {scope} AND COALESCE(a.eligible, 'No') <> {ELIGIBLE_SQL}
+        GROUP BY a.company_id
+        ON DUPLICATE KEY UPDATE total_eligible = total_eligible + VALUES(total_eligible)
+    """, params)
+    cursor.execute(f"""
+        UPDATE applications a
+        JOIN students s ON s.id = a.student_id
+        JOIN companies c ON c.id = a.company_id
+        SET a.eligible = {ELIGIBLE_SQL}
+        WHERE ({where}) AND c.min_cgpa IS NOT NULL
+          AND NOT (a.eligible <=> {ELIGIBLE_SQL})
+    """, params)
+    return max(cursor.rowcount, 0)
+
+
+def reevaluate_students(cursor, student_ids, batch_size=BATCH_SIZE):
+    """After students change: re-evaluate their (student, company) pairs on the caller's cursor."""
+    student_ids = [i for i in dict.fromkeys(student_ids) if i is not None]
+    changed = 0
+    for i in range(0, len(student_ids), batch_size):
+        chunk = tuple(student_ids[i:i + batch_size])
+        changed += _reevaluate(cursor, f"a.student_id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+    return changed
+
+
+def reevaluate_company(cursor, company_id):
+    """After a company's criteria change: re-evaluate its applications on the caller's cursor."""
+    return _reevaluate(cursor, "a.company_id = %s", (company_id,))
+
+
+def recompute_all(batch_size=BATCH_SIZE):
+    """Full recompute across every company in applications.id ranges, one short transaction each."""
+    changed = 0
+    with db.cursor(dictionary=False) as (cursor, conn):
+        cursor.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM applications")
+        low, high = cursor.fetchone()
+        for start in range(low, high + 1, batch_size):
+            conn.start_transaction()
+            changed += _reevaluate(cursor, "a.id BETWEEN %s AND %s", (start, start + batch_size - 1))
+            conn.commit()
+    logging.info(f"Eligibility recompute: {changed} applications changed")
+    return changed
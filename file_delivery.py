@@ -0,0 +1,76 @@
+# file_delivery.py
+import os
+import hashlib
+import mimetypes
+from stat import S_ISREG
+from urllib.parse import quote
+
+from flask import Response, abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+from cache import TTLCache
+
+# ✅ Downloads of uploaded files:
+#   - ETag = SHA-256 of the content, hashed once per file version (path, size, mtime)
+#   - If-None-Match / If-Modified-Since answered with 304, Range with 206 (send_file conditional)
+#   - FILE_OFFLOAD=x-accel hands the bytes to nginx via X-Accel-Redirect (internal location
+#     FILE_ACCEL_PREFIX mapped to the upload folder); FILE_OFFLOAD=x-sendfile sets X-Sendfile
+#     for Apache/lighttpd (Flask's USE_X_SENDFILE). Default: the worker sends the file itself.
+FILE_OFFLOAD = os.getenv("FILE_OFFLOAD", "").lower()
+FILE_ACCEL_PREFIX = "/" + os.getenv("FILE_ACCEL_PREFIX", "/protected-uploads/").strip("/") + "/"
+
+ETAG_CACHE = TTLCache(ttl=24 * 3600, maxsize=2048)
+HASH_CHUNK = 1024 * 1024
+
+
+def content_etag(path, stat):
+    """SHA-256 of the file, computed once per (path, size, mtime) in this worker."""
+    def load():
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    return ETAG_CACHE.get_or_set((path, stat.st_size, stat.st_mtime_ns), load)
+
+
+def send_upload(upload_folder, relative_path, download_name=None):
+    """
+    Response for a file under upload_folder (None if it does not exist), with a
+    content-hash ETag and conditional / Range handling, or offloaded to the proxy.
+    Paths that leave upload_folder ("../", absolute, symlinks pointing out) get a 404.
+    """
+    # relative upload folders resolve against the app root, as send_file does
+    base = os.path.realpath(os.path.join(current_app.root_path, upload_folder))
+    full_path = safe_join(base, relative_path.replace("\\", "/").lstrip("/"))
+    if full_path is None or os.path.commonpath([base, os.path.realpath(full_path)]) != base:
+        abort(404)
+    # the proxy gets the normalized path, never the raw request value
+    relative_path = os.path.relpath(full_path, base).replace(os.sep, "/")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        return None
+    if not S_ISREG(stat.st_mode):
+        return None
+    download_name = download_name or os.path.basename(full_path)
+    etag = content_etag(full_path, stat)
+
+    if FILE_OFFLOAD == "x-accel":
+        # nginx serves the bytes (and Range); we only answer revalidation ourselves
+        response = Response(mimetype=mimetypes.guess_type(download_name)[0] or "application/octet-stream")
+        response.headers["X-Accel-Redirect"] = FILE_ACCEL_PREFIX + quote(relative_path)
+        response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+        response.make_conditional(request)
+    else:
+        # with app.config["USE_X_SENDFILE"] (FILE_OFFLOAD=x-sendfile) this emits X-Sendfile
+        response = send_file(full_path, as_attachment=True, download_name=download_name,
+                             etag=etag, last_modified=stat.st_mtime, conditional=True)
+
+    # files sit behind a login: browsers may keep them but must revalidate (cheap 304s)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,11 @@
+# gunicorn.conf.py — picked up automatically by `gunicorn main:app`
+import os
+
+# ✅ Threaded workers: a streaming /api/ai/ask response holds a cheap thread,
+# not a whole worker process, while the answer is produced on the AI pool.
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))   # db_connection sizes its pool from this
+
+# long enough for an AI answer (AI_DEADLINE) plus slack
+timeout = int(float(os.getenv("AI_DEADLINE", "45"))) + 30
@@ -0,0 +1,160 @@
+# jobs.py
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import db_connection as db
+import metrics
+import querylog
+
+# ✅ Local background workers (no broker): each gunicorn worker owns a small thread pool.
+# Job state lives in the `upload_jobs` table so any worker can answer status polls.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "1.0"))   # seconds between DB progress writes
+MAX_STORED_ERRORS = 200                                                # row errors kept in the job record
+
+_EXECUTOR = None
+_EXECUTOR_PID = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor():
+    """Thread pool for this process (re-created after fork, like the DB pool)."""
+    global _EXECUTOR, _EXECUTOR_PID
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_PID != os.getpid():
+            _EXECUTOR = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="upload-job")
+            _EXECUTOR_PID = os.getpid()
+        return _EXECUTOR
+
+
+class JobProgress:
+    """
+    Handed to the job function. Call update() as work goes on; writes to the
+    job record are throttled to one every PROGRESS_INTERVAL seconds.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.total_rows = None
+        self.rows_parsed = 0
+        self.inserted = 0
+        self.failed = 0
+        self._last_flush = 0.0
+
+    def set_total(self, total_rows):
+        self.total_rows = total_rows
+        self.flush()
+
+    def update(self, rows_parsed=None, inserted=None, failed=None):
+        if rows_parsed is not None:
+            self.rows_parsed = rows_parsed
+        if inserted is not None:
+            self.inserted = inserted
+        if failed is not None:
+            self.failed = failed
+        if time.monotonic() - self._last_flush >= PROGRESS_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        _update_job(self.job_id, total_rows=self.total_rows, rows_parsed=self.rows_parsed,
+                    inserted=self.inserted, failed=self.failed)
+
+
+def _update_job(job_id, **fields):
+    cols = ", ".join(f"{k}=%s" for k in fields)
+    with db.cursor(dictionary=False) as (cursor, conn):
+        cursor.execute(f"UPDATE upload_jobs SET {cols} WHERE id=%s", (*fields.values(), job_id))
+
+
+def failure_message(e):
+    """
+    What a failed job shows its poller. Validation errors (missing column, bad file
+    type) are our own messages; driver errors can quote row values, so only their
+    code is stored and the full error stays in the log.
+    """
+    if isinstance(e, ValueError):
+        return str(e)[:1000]
+    errno = getattr(e, "errno", None)
+    return f"{type(e).__name__} ({errno})" if errno else type(e).__name__
+
+
+def _run(job_id, kind, fn, args, kwargs, cleanup_path):
+    progress = JobProgress(job_id)
+    started, status = time.perf_counter(), "failed"
+    try:
+        _update_job(job_id, status="running", started_at=datetime.now())
+        # batched imports repeat their INSERT per batch by design: flag, never fail
+        with querylog.track(f"job:{kind}", strict=False):
+            result = fn(*args, progress=progress, **kwargs) or {}
+        if len(result.get("errors") or []) > MAX_STORED_ERRORS:
+            result = dict(result, errors=result["errors"][:MAX_STORED_ERRORS], errors_truncated=True)
+        _update_job(
+            job_id,
+            status="done",
+            total_rows=progress.total_rows,
+            rows_parsed=progress.rows_parsed,
+            inserted=result.get("inserted", progress.inserted),
+            failed=result.get("failed", progress.failed),
+            result=json.dumps(result, default=str),
+            finished_at=datetime.now(),
+        )
+        status = "done"
+    except Exception as e:
+        logging.exception(f"Job {job_id} failed")
+        try:
+            _update_job(job_id, status="failed", message=failure_message(e),
+                        finished_at=datetime.now())
+        except Exception:
+            logging.exception(f"Could not record failure of job {job_id}")
+    finally:
+        metrics.JOB_SECONDS.observe(time.perf_counter() - started, kind=kind, status=status)
+        if cleanup_path and os.path.exists(cleanup_path):
+            os.remove(cleanup_path)
+
+
+def submit(kind, fn, *args, file_name=None, cleanup_path=None, **kwargs):
+    """
+    Record a queued job and run fn(*args, progress=JobProgress, **kwargs) in the background.
+    fn should return a dict (e.g. {'inserted', 'failed', 'errors'}).
+    Returns the job id immediately.
+    """
+    with db.cursor(dictionary=False) as (cursor, conn):
+        cursor.execute(
+            "INSERT INTO upload_jobs (kind, status, file_name) VALUES (%s, 'queued', %s)",
+            (kind, file_name)
+        )
+        job_id = cursor.lastrowid
+
+    _executor().submit(_run, job_id, kind, fn, args, kwargs, cleanup_path)
+    return job_id
+
+
+def get_job(job_id):
+    """Job record as a dict, with elapsed seconds and an ETA when the total is known."""
+    with db.cursor() as (cursor, conn):
+        cursor.execute("SELECT * FROM upload_jobs WHERE id=%s", (job_id,))
+        job = cursor.fetchone()
+    if not job:
+        return None
+
+    job["result"] = json.loads(job["result"]) if job.get("result") else None
+    job["eta_seconds"] = None
+    started, finished = job.get("started_at"), job.get("finished_at")
+    if started:
+        # started_at / finished_at are written with this server's clock (see _run)
+        elapsed = ((finished or datetime.now()) - started).total_seconds()
+        job["elapsed_seconds"] = round(elapsed, 1)
+        parsed, total = job.get("rows_parsed") or 0, job.get("total_rows")
+        if job["status"] == "running" and total and parsed and elapsed > 0:
+            job["eta_seconds"] = round((total - parsed) / (parsed / elapsed), 1)
+
+    for k in ("created_at", "started_at", "finished_at"):
+        if job.get(k):
+            job[k] = job[k].isoformat()
+    return job
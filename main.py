@@ -1,50 +1,135 @@
 from multiprocessing.resource_tracker import getfd
 import os
+import sys
 import json
+import uuid
 import mysql.connector
 import pandas as pd
 from flask import (
     Flask, request, render_template, redirect, send_file, url_for, flash,
-    send_from_directory, session, abort
+    send_from_directory, session, abort, g
 )
 from werkzeug.utils import secure_filename
-from db_connection import get_connection  # must return mysql connector connection
-from utils import bulk_add_students        # your existing util (ensure it handles registration_number)
+import db_connection as db                # pooled connections: db.connection() / db.cursor()
+from utils import (                        # your existing util (ensure it handles registration_number)
+    bulk_add_students, add_company_to_applications, get_dashboard_stats, mark_data_changed,
+    get_company_stats, bump_company_stats, refresh_company_stats, import_round_results, STATS_CACHE,
+    read_cursor, get_profile, invalidate_profile, encode_cursor, decode_cursor, page_size,
+    search_companies, save_company_rounds, group_rounds,
+    read_round_results, cache_round_file
+)
+import jobs
+import eligibility as eligibility_engine   # applications.eligible re-evaluation
+import migrations
+import metrics
+import querylog
+from file_delivery import send_upload, FILE_OFFLOAD
 from datetime import datetime
 from authlib.integrations.flask_client import OAuth
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
+from concurrent.futures import TimeoutError as FutureTimeout
 from flask_cors import CORS
 
 
 
-from portal_ai import AI  
+from portal_ai import AI, ANSWER_CACHE, AIQueueFull, AI_DEADLINE, submit_question, ticket_events
 app = Flask(__name__)
 CORS(app)
 
 app.secret_key = "your_secret_key"
 
+# 📊 per-request latency / query counts (served at /metrics), slow-query + N+1 checks
+db.add_query_hook(metrics.record_query)
+db.add_query_hook(querylog.record_query)
+
+
+@app.before_request
+def _metrics_start():
+    metrics.start_request()
+    querylog.start(request.endpoint or "unmatched")
+
+
+@app.after_request
+def _metrics_finish(response):
+    metrics.finish_request(request.endpoint, request.method, response.status_code)
+    querylog.finish()       # QUERY_TRACKING=strict: raises QueryPolicyError for a flagged request
+    return response
+
+
+@app.teardown_request
+def _metrics_teardown(error=None):
+    # after_request is skipped when a view raises: record those as 500s
+    metrics.finish_request(request.endpoint, request.method, 500)
+    querylog.discard()
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.route("/api/ai/ask", methods=["POST"])
 def ask_ai():
-    data = request.get_json()
-    question = data.get("question")
+    data = request.get_json(silent=True) or {}
+    question = (data.get("question") or "").strip()
 
     if not question:
         return jsonify({"error": "Question is required"}), 400
 
-    response = AI(question).ask()
-    return jsonify({"answer": response})
+    wants_stream = "text/event-stream" in request.headers.get("Accept", "")
+
+    # ⚡ cache hits and fast-path questions never touch the AI pool
+    ai = AI(question)
+    answer = ai.cached()
+    if answer is None:
+        answer = ai.fast_answer()
+    if answer is not None:
+        if wants_stream:
+            return Response(_sse("answer", {"answer": answer}), mimetype="text/event-stream")
+        return jsonify({"answer": answer})
+
+    try:
+        ticket = submit_question(question)
+    except AIQueueFull:
+        return jsonify({"error": "The AI assistant is busy, please try again in a minute."}), 503
+
+    if not wants_stream:
+        try:
+            answer = ticket.future.result(timeout=max(ticket.remaining(), 0))
+        except FutureTimeout:
+            ticket.cancel()
+            return jsonify({"error": f"No answer within {AI_DEADLINE:.0f}s, please try again."}), 504
+        return jsonify({"answer": answer})
+
+    def stream():
+        for event, payload in ticket_events(ticket):
+            yield _sse(event, payload)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ---------------- CONFIG ----------------
 # UPLOAD_FOLDER is the folder where files are physically stored on disk
 app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
+app.config['USE_X_SENDFILE'] = FILE_OFFLOAD == "x-sendfile"
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 ALLOWED_COMPANY_EXTENSIONS = {'pdf', 'docx'}
 ALLOWED_STUDENT_EXTENSIONS = {'csv', 'xls', 'xlsx'}
 ALLOWED_ROUND_EXTENSIONS = {'csv', 'xls', 'xlsx'}
 
+def save_upload_for_job(file):
+    """Save an uploaded file under a unique name so a background job can read it later."""
+    job_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'jobs')
+    os.makedirs(job_dir, exist_ok=True)
+    save_path = os.path.join(job_dir, f"{uuid.uuid4().hex}_{secure_filename(file.filename)}")
+    file.save(save_path)
+    return save_path
+
+
 def allowed_file(filename, allowed_exts=None):
     if not filename:
         return False
@@ -113,14 +198,11 @@ def google_callback():
             flash("Login role missing. Please try again.", "danger")
             return redirect(url_for("home"))
 
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
         # ✅ ADMIN ONLY
         if role == "admin":
-            cursor.execute("SELECT * FROM admin_auth WHERE email=%s", (email,))
-            admin = cursor.fetchone()
-            cursor.close(); conn.close()
+            with db.cursor() as (cursor, conn):
+                cursor.execute("SELECT * FROM admin_auth WHERE email=%s", (email,))
+                admin = cursor.fetchone()
 
             if admin:
                 session.clear()
@@ -133,9 +215,9 @@ def google_callback():
 
         # ✅ TUTOR ONLY
         if role == "tutor":
-            cursor.execute("SELECT * FROM tutors WHERE email=%s", (email,))
-            tutor = cursor.fetchone()
-            cursor.close(); conn.close()
+            with db.cursor() as (cursor, conn):
+                cursor.execute("SELECT * FROM tutors WHERE email=%s", (email,))
+                tutor = cursor.fetchone()
 
             if tutor:
                 session.clear()
@@ -149,14 +231,15 @@ def google_callback():
 
         # ✅ STUDENT ONLY
         if role == "student":
-            cursor.execute("SELECT * FROM students WHERE email=%s", (email,))
-            student = cursor.fetchone()
-            cursor.close(); conn.close()
+            with db.cursor() as (cursor, conn):
+                cursor.execute("SELECT * FROM students WHERE email=%s", (email,))
+                student = cursor.fetchone()
 
             if student:
                 session.clear()
                 session["student_email"] = student.get("email")
                 session["student_reg"] = student.get("registration_number")
+                session["student_id"] = student.get("id")
                 session["student_name"] = student.get("name")
                 flash(f"Welcome {student.get('name')}! (Google Login)", "success")
                 return redirect(url_for("student_dashboard"))
@@ -172,66 +255,9 @@ def google_callback():
 
 
 
-# ----------------- DB HELPER: ensure helper tables exist -----------------
-def ensure_helper_tables():
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        # ✅ 1) Ensure companies table exists (required for FK)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS companies (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL
-            )
-        """)
-
-        # ✅ 2) company_shortlist table (depends on companies)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS company_shortlist (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                company_id INT NOT NULL,
-                round_number INT NOT NULL,
-                registration_number VARCHAR(50) NOT NULL,
-                student_name VARCHAR(255),
-                email VARCHAR(255),
-                branch VARCHAR(50),
-                year VARCHAR(20),
-                status ENUM('Passed','Failed') DEFAULT 'Passed',
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE KEY uniq_student_round (company_id, round_number, registration_number),
-                CONSTRAINT fk_company_shortlist_company
-                    FOREIGN KEY (company_id) REFERENCES companies(id)
-                    ON DELETE CASCADE
-                    ON UPDATE CASCADE
-            )
-        """)
-
-        # ✅ 3) uploaded_round_files table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS uploaded_round_files (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                company_id INT NOT NULL,
-                round_number INT NOT NULL,
-                file_name VARCHAR(255),
-                file_path VARCHAR(255),
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        conn.commit()
-        print("✅ Helper tables ensured successfully.")
-
-    except Exception as e:
-        print("⚠️ ensure_helper_tables error:", e)
-        conn.rollback()
+# ----------------- DB schema: versioned migrations in migrations.py -----------------
+# Run once per deploy (`flask --app main migrate`, see procfile / nixpacks.toml), not per worker.
 
-    finally:
-        cursor.close()
-        conn.close()
-
-
-# 🔥 CALL IT (THIS WAS MISSING)
-ensure_helper_tables()
 # -------- ADMIN SIGNUP --------
 @app.route('/admin/signup', methods=['GET', 'POST'])
 def admin_signup():
@@ -248,24 +274,18 @@ def admin_signup():
             flash("Passwords do not match", "danger")
             return redirect(url_for('admin_signup'))
 
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(
-                "INSERT INTO admin_auth (email, password) VALUES (%s, %s)",
-                (email, password)
-            )
-            conn.commit()
-            flash("Admin account created successfully. Please login.", "success")
-            return redirect(url_for('admin_login'))
-
-        except mysql.connector.IntegrityError:
-            flash("Admin already exists with this email", "danger")
+        with db.cursor(dictionary=False) as (cursor, conn):
+            try:
+                cursor.execute(
+                    "INSERT INTO admin_auth (email, password) VALUES (%s, %s)",
+                    (email, password)
+                )
+                conn.commit()
+                flash("Admin account created successfully. Please login.", "success")
+                return redirect(url_for('admin_login'))
 
-        finally:
-            cursor.close()
-            conn.close()
+            except mysql.connector.IntegrityError:
+                flash("Admin already exists with this email", "danger")
 
     return render_template('admin_signup.html')
 
@@ -282,17 +302,12 @@ def admin_login():
             flash("Email and password are required", "danger")
             return redirect(url_for('admin_login'))
 
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        cursor.execute(
-            "SELECT * FROM admin_auth WHERE email=%s AND password=%s",
-            (email, password)
-        )
-        admin = cursor.fetchone()
-
-        cursor.close()
-        conn.close()
+        with db.cursor() as (cursor, conn):
+            cursor.execute(
+                "SELECT * FROM admin_auth WHERE email=%s AND password=%s",
+                (email, password)
+            )
+            admin = cursor.fetchone()
 
         if admin:
             session.clear()                 # 🔥 clear old sessions
@@ -316,44 +331,7 @@ def admin_dashboard():
         flash("Please login as admin", "warning")
         return redirect(url_for('admin_login'))
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        cursor.execute("SELECT COUNT(*) AS total_students FROM students")
-        total_students = cursor.fetchone()['total_students']
-
-        cursor.execute("SELECT COUNT(*) AS total_companies FROM companies")
-        total_companies = cursor.fetchone()['total_companies']
-
-        cursor.execute("SELECT COUNT(*) AS total_applications FROM applications")
-        total_applications = cursor.fetchone()['total_applications']
-
-        cursor.execute("SELECT COUNT(*) AS total_eligible FROM applications WHERE eligible='Yes'")
-        total_eligible = cursor.fetchone()['total_eligible']
-
-        cursor.execute("SELECT COUNT(*) AS total_not_eligible FROM applications WHERE eligible='No'")
-        total_not_eligible = cursor.fetchone()['total_not_eligible']
-
-        cursor.execute("SELECT COUNT(*) AS total_applied FROM applications WHERE applied='Yes'")
-        total_applied = cursor.fetchone()['total_applied']
-
-        cursor.execute("SELECT COUNT(*) AS total_not_applied FROM applications WHERE applied='No'")
-        total_not_applied = cursor.fetchone()['total_not_applied']
-
-    finally:
-        cursor.close()
-        conn.close()
-
-    stats = {
-        'total_students': total_students,
-        'total_companies': total_companies,
-        'total_applications': total_applications,
-        'total_eligible': total_eligible,
-        'total_not_eligible': total_not_eligible,
-        'total_applied': total_applied,
-        'total_not_applied': total_not_applied
-    }
+    stats = get_dashboard_stats()
 
     return render_template('index_admin.html', stats=stats)
 
@@ -362,90 +340,21 @@ def admin_dashboard():
 # ---------------- ROOT / HOME ----------------
 @app.route('/')
 def home():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT COUNT(*) AS total_students FROM students")
-        total_students = cursor.fetchone().get('total_students', 0) or 0
-
-        cursor.execute("SELECT COUNT(*) AS total_companies FROM companies")
-        total_companies = cursor.fetchone().get('total_companies', 0) or 0
-
-        cursor.execute("SELECT COUNT(*) AS total_applications FROM applications")
-        total_applications = cursor.fetchone().get('total_applications', 0) or 0
-
-        cursor.execute("SELECT COUNT(*) AS total_eligible FROM applications WHERE eligible='Yes'")
-        total_eligible = cursor.fetchone().get('total_eligible', 0) or 0
-
-        cursor.execute("SELECT COUNT(*) AS total_not_eligible FROM applications WHERE eligible='No'")
-        total_not_eligible = cursor.fetchone().get('total_not_eligible', 0) or 0
-
-        cursor.execute("SELECT COUNT(*) AS total_applied FROM applications WHERE applied='Yes'")
-        total_applied = cursor.fetchone().get('total_applied', 0) or 0
-
-        cursor.execute("SELECT COUNT(*) AS total_not_applied FROM applications WHERE applied='No'")
-        total_not_applied = cursor.fetchone().get('total_not_applied', 0) or 0
-
-    finally:
-        cursor.close()
-        conn.close()
-
-    stats = {
-        'total_students': total_students,
-        'total_companies': total_companies,
-        'total_applications': total_applications,
-        'total_eligible': total_eligible,
-        'total_not_eligible': total_not_eligible,
-        'total_applied': total_applied,
-        'total_not_applied': total_not_applied
-    }
+    stats = get_dashboard_stats()
     return render_template('index.html', stats=stats)
 @app.route('/companies_dashboard')
 def companies_dashboard():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
+    with read_cursor() as (cursor, conn):
         # FIXED: Removed invalid column "status"
         cursor.execute("SELECT name FROM companies")
         companies = cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
 
     return render_template("companies_dashboard.html", companies=companies)
 
 
 @app.route('/company/<company_name>')
 def company_dashboard(company_name):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        cursor.execute("""
-            SELECT 
-                COUNT(*) AS total_applications,
-                SUM(eligible='Yes') AS total_eligible,
-                SUM(eligible='No') AS total_not_eligible,
-                SUM(applied='Yes') AS total_applied,
-                SUM(applied='No') AS total_not_applied
-            FROM applications
-            WHERE company_name=%s
-        """, (company_name,))
-        data = cursor.fetchone()
-
-    finally:
-        cursor.close()
-        conn.close()
-
-    stats = {
-        'company_name': company_name,
-        'total_applications': data.get('total_applications', 0),
-        'total_eligible': data.get('total_eligible', 0),
-        'total_not_eligible': data.get('total_not_eligible', 0),
-        'total_applied': data.get('total_applied', 0),
-        'total_not_applied': data.get('total_not_applied', 0)
-    }
+    stats = get_company_stats(company_name)
 
     return render_template('company_dashboard.html', stats=stats)
 
@@ -453,51 +362,70 @@ def company_dashboard(company_name):
 
 @app.route('/status')
 def status():
-    return {"message": "🚀 Training Portal API is running!"}
+    return {
+        "message": "🚀 Training Portal API is running!",
+        "db_pool": db.pool_stats(),
+        "stats_cache": STATS_CACHE.stats(),
+        "ai_cache": ANSWER_CACHE.stats()
+    }
+
+
+# ---------------- METRICS (Prometheus text format) ----------------
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        abort(401)
+    pool = db.pool_stats()
+    gauges = {
+        "tnp_db_pool_size": ("Connections this worker's pool may open.", pool.get("size", 0)),
+        "tnp_db_pool_checked_out": ("Connections currently borrowed.", pool.get("checked_out", 0)),
+        "tnp_db_pool_idle": ("Idle pooled connections.", pool.get("idle", 0)),
+        "tnp_db_pool_waits": ("Checkouts that had to wait for a free connection.", pool.get("waits", 0)),
+        "tnp_db_pool_timeouts": ("Checkouts that timed out.", pool.get("timeouts", 0)),
+    }
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+# ---------------- ADMIN: background upload job status ----------------
+@app.route('/admin/jobs/<int:job_id>')
+def job_status(job_id):
+    if 'admin_email' not in session and 'tutor_email' not in session:
+        return jsonify({"error": "Please login first"}), 401
+    job = jobs.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
 
 
 # ---------------- ADMIN: Company Rounds - list of companies ----------------
 @app.route('/admin/company_rounds')
 def admin_company_rounds_list():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
+    with read_cursor() as (cursor, conn):
         cursor.execute("SELECT id, name FROM companies ORDER BY name ASC")
         companies = cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
     return render_template('admin_company_rounds.html', companies=companies)
 
 
 # ---------------- ADMIN: Company Rounds View (specific company) ----------------
 @app.route('/admin/company_rounds/<int:company_id>')
 def admin_company_rounds_view(company_id):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT * FROM companies WHERE id = %s", (company_id,))
-        company = cursor.fetchone()
-        if not company:
+    with read_cursor() as (cursor, conn):
+        # ✅ company + its rounds in one query (company_rounds, not JSON parsing)
+        cursor.execute("""
+            SELECT c.*, r.round_number, r.round_name
+            FROM companies c
+            LEFT JOIN company_rounds r ON r.company_id = c.id
+            WHERE c.id = %s
+            ORDER BY r.round_number
+        """, (company_id,))
+        grouped = group_rounds(cursor.fetchall())
+        if not grouped:
             return "Company not found", 404
-
-        selection_process = company.get("selection_process") or ""
-
-        rounds = []
-        if isinstance(selection_process, str) and selection_process.strip().startswith('['):
-            try:
-                sel = json.loads(selection_process)
-                if isinstance(sel, list):
-                    for i, name in enumerate(sel):
-                        rounds.append({"round_number": i+1, "round_name": str(name)})
-            except Exception:
-                parts = selection_process.split(",")
-                for i, p in enumerate(parts):
-                    rounds.append({"round_number": i+1, "round_name": p.strip()})
-        else:
-            parts = [p.strip() for p in str(selection_process).split(",") if p.strip()]
-            for i, p in enumerate(parts):
-                rounds.append({"round_number": i+1, "round_name": p})
+        company = grouped[0]
+        rounds = company['rounds']
 
         cursor.execute("""
             SELECT id, round_number, file_name, file_path, uploaded_at
@@ -506,15 +434,13 @@ def admin_company_rounds_view(company_id):
             ORDER BY round_number ASC, uploaded_at DESC
         """, (company_id,))
         uploaded_files = cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
 
     return render_template(
         'admin_company_rounds_view.html',
         company=company,
         rounds=rounds,
-        uploaded_files=uploaded_files
+        uploaded_files=uploaded_files,
+        job_id=request.args.get('job', type=int)
     )
 
 
@@ -536,69 +462,27 @@ def admin_upload_round(company_id, round_number):
         flash("Invalid file type", "danger")
         return redirect(request.referrer)
 
-    # 📥 Read file
-    try:
-        if file.filename.endswith(('xls', 'xlsx')):
-            df = pd.read_excel(file)
-        else:
-            df = pd.read_csv(file)
-    except Exception as e:
-        flash(f"File read error: {e}", "danger")
-        return redirect(request.referrer)
-
-    # Normalize columns
-    df.columns = [c.strip().lower() for c in df.columns]
-
-    REQUIRED = ['registration_number', 'student_name', 'email', 'branch', 'year']
-    for col in REQUIRED:
-        if col not in df.columns:
-            flash(f"Missing column: {col}", "danger")
-            return redirect(request.referrer)
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    try:
-        # 🧹 Clean old round data
+    # 📁 keep the sheet for tutors (uploaded_round_files); its rows are cached by the job
+    file_name = secure_filename(file.filename)
+    relative_path = f"rounds/{company_id}/{uuid.uuid4().hex}_{file_name}"
+    save_path = os.path.join(app.config['UPLOAD_FOLDER'], relative_path)
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    file.save(save_path)
+    with db.cursor(dictionary=False) as (cursor, conn):
         cursor.execute("""
-            DELETE FROM company_shortlist
-            WHERE company_id=%s AND round_number=%s
-        """, (company_id, round_number))
-
-        insert_sql = """
-            INSERT INTO company_shortlist
-            (company_id, round_number, registration_number,
-             student_name, email, branch, year, status)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-        """
-
-        inserted = 0
-
-        for _, row in df.iterrows():
-            cursor.execute(insert_sql, (
-                company_id,
-                round_number,
-                str(row['registration_number']).strip(),
-                row['student_name'],
-                row['email'],
-                row['branch'],
-                row['year'],
-                row.get('status', 'Passed')
-            ))
-            inserted += 1
-
-        conn.commit()
-        flash(f"✅ Uploaded successfully: {inserted} students", "success")
-
-    except Exception as e:
-        conn.rollback()
-        flash(f"❌ DB Error: {e}", "danger")
-
-    finally:
-        cursor.close()
-        conn.close()
+            INSERT INTO uploaded_round_files (company_id, round_number, file_name, file_path)
+            VALUES (%s, %s, %s, %s)
+        """, (company_id, round_number, file_name, relative_path))
+        file_id = cursor.lastrowid
+
+    # 📥 Parse + load in the background; the request returns straight away
+    job_id = jobs.submit(
+        "round_results", import_round_results, save_path, company_id, round_number,
+        file_id=file_id, file_name=file_name
+    )
+    flash(f"⏳ Round {round_number} results queued (job #{job_id})", "info")
 
-    return redirect(url_for('admin_company_rounds_view', company_id=company_id))
+    return redirect(url_for('admin_company_rounds_view', company_id=company_id, job=job_id))
 
 
 
@@ -609,9 +493,7 @@ def admin_upload_round(company_id, round_number):
 def edit_student_by_email():
     student = None
     if request.method == 'POST':
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        try:
+        with db.cursor() as (cursor, conn):
             if 'fetch' in request.form:
                 email = request.form.get('email', '').strip()
                 cursor.execute("SELECT * FROM students WHERE email = %s", (email,))
@@ -629,6 +511,7 @@ def edit_student_by_email():
                 specialization = request.form.get('specialization')
                 registration_number = request.form.get('registration_number')
 
+                conn.start_transaction()
                 cursor.execute("""
                     UPDATE students
                     SET name=%s, phone=%s, course=%s, cgpa=%s, backlogs=%s,
@@ -636,14 +519,17 @@ def edit_student_by_email():
                     WHERE email=%s
                 """, (name, phone, course, cgpa, backlogs, section, specialization, registration_number, email))
 
+                # 🔥 cgpa/backlogs may have changed: re-evaluate only this student's applications
+                cursor.execute("SELECT id FROM students WHERE email = %s", (email,))
+                changed = eligibility_engine.reevaluate_students(cursor, [r['id'] for r in cursor.fetchall()])
+
                 conn.commit()  # <-- use this directly
-                flash("✅ Student updated successfully.", "success")
+                invalidate_profile("student", email)
+                mark_data_changed()
+                flash(f"✅ Student updated successfully ({changed} eligibility flags changed).", "success")
 
                 cursor.execute("SELECT * FROM students WHERE email = %s", (email,))
                 student = cursor.fetchone()
-        finally:
-            cursor.close()
-            conn.close()
 
     return render_template('edit_student_by_email.html', student=student)
 
@@ -651,31 +537,15 @@ def edit_student_by_email():
 # ---------------- ADMIN: View all companies ----------------
 @app.route('/admin/companies')
 def admin_companies():
-    selected_role = request.args.get('role')
+    selected_role = request.args.get('role', '').strip()
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    per_page = page_size(request.args.get('per_page'), default=20, maximum=100)
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        if selected_role:
-            cursor.execute("""
-                SELECT *
-                FROM companies
-                WHERE LOWER(job_description) LIKE %s
-                ORDER BY drive_date DESC
-            """, (f"%{selected_role.lower()}%",))
-        else:
-            cursor.execute("""
-                SELECT *
-                FROM companies
-                ORDER BY drive_date DESC
-            """)
-
-        companies = cursor.fetchall()
-
-    finally:
-        cursor.close()
-        conn.close()
+    # 🔎 free-text search and the role buttons share the FULLTEXT search
+    term = " ".join(t for t in (selected_role, query) if t)
+    companies, total = search_companies(term, page=page, per_page=per_page)
+    pages = max(1, -(-total // per_page))
 
     JOB_ROLES = [
         "Data Analytics",
@@ -691,7 +561,12 @@ def admin_companies():
         'admin_companies.html',
         companies=companies,
         job_roles=JOB_ROLES,
-        selected_role=selected_role
+        selected_role=selected_role,
+        query=query,
+        page=page,
+        pages=pages,
+        total=total,
+        per_page=per_page
     )
 
 
@@ -699,9 +574,7 @@ def admin_companies():
 # ---------------- ADMIN: Update eligibility for a company ----------------
 @app.route('/admin/update-eligibility/<company_name>', methods=['GET', 'POST'])
 def update_eligibility(company_name):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
+    with db.cursor() as (cursor, conn):
         cursor.execute("SELECT * FROM companies WHERE name=%s", (company_name,))
         company = cursor.fetchone()
         if not company:
@@ -723,34 +596,34 @@ def update_eligibility(company_name):
                 "tcsion_active": tcsion_active
             })
 
-            cursor.execute("UPDATE companies SET eligibility=%s WHERE name=%s", (eligibility, company_name))
+            min_cgpa, max_backlogs = eligibility_engine.parse_criteria(eligibility)
+            conn.start_transaction()
+            cursor.execute(
+                "UPDATE companies SET eligibility=%s, min_cgpa=%s, max_backlogs=%s WHERE id=%s",
+                (eligibility, min_cgpa, max_backlogs, company['id'])
+            )
+            changed = eligibility_engine.reevaluate_company(cursor, company['id'])
             conn.commit()
-            flash("✅ Eligibility updated successfully.", "success")
+            mark_data_changed()
+            flash(f"✅ Eligibility updated successfully ({changed} applications changed).", "success")
             return redirect(url_for('admin_companies'))
 
-    finally:
-        cursor.close()
-        conn.close()
-
     return render_template('set_eligibility.html', company=company)
 
 
 # ---------------- ADMIN: Delete company ----------------
 @app.route('/admin/delete-company/<int:company_id>', methods=['POST'])
 def delete_company(company_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("DELETE FROM companies WHERE id=%s", (company_id,))
-        cursor.execute("DELETE FROM applications WHERE company_name NOT IN (SELECT name FROM companies)")
-        conn.commit()
-        flash("✅ Company deleted successfully.", "success")
-    except Exception as e:
-        conn.rollback()
-        flash(f"❌ Failed to delete company: {e}", "danger")
-    finally:
-        cursor.close()
-        conn.close()
+    with db.cursor(dictionary=False) as (cursor, conn):
+        try:
+            # applications / company_stats rows go with it (ON DELETE CASCADE on company_id)
+            cursor.execute("DELETE FROM companies WHERE id=%s", (company_id,))
+            conn.commit()
+            mark_data_changed()
+            flash("✅ Company deleted successfully.", "success")
+        except Exception as e:
+            conn.rollback()
+            flash(f"❌ Failed to delete company: {e}", "danger")
     return redirect(url_for('admin_companies'))
 
 @app.route('/admin/edit-company', methods=['GET', 'POST'])
@@ -760,9 +633,7 @@ def edit_company_by_name():
         flash("❌ No company specified.", "danger")
         return redirect(url_for('admin_companies'))
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
+    with db.cursor() as (cursor, conn):
         cursor.execute("SELECT * FROM companies WHERE name=%s", (company_name,))
         company = cursor.fetchone()
         if not company:
@@ -771,18 +642,24 @@ def edit_company_by_name():
 
         if request.method == 'POST':
             # Example: update selection_process or other fields
-            selection_process = request.form.get('selection_process', '').split(',')
+            # one form field per round; names may contain commas ("Aptitude, Coding")
+            selection_process = [s.strip() for s in request.form.getlist('selection_process') if s.strip()]
+            conn.start_transaction()
             cursor.execute(
-                "UPDATE companies SET selection_process=%s WHERE name=%s",
-                (json.dumps(selection_process), company_name)
+                "UPDATE companies SET selection_process=%s WHERE id=%s",
+                (json.dumps(selection_process), company['id'])
             )
+            save_company_rounds(cursor, company['id'], selection_process)
             conn.commit()
+            mark_data_changed()
             flash("✅ Company updated successfully.", "success")
             return redirect(url_for('admin_companies'))
 
-    finally:
-        cursor.close()
-        conn.close()
+        cursor.execute(
+            "SELECT round_name FROM company_rounds WHERE company_id=%s ORDER BY round_number",
+            (company['id'],)
+        )
+        company['selection_process'] = [r['round_name'] for r in cursor.fetchall()]
 
     return render_template('edit_company.html', company=company)
 
@@ -810,50 +687,34 @@ def admin_add_company():
 
             nomination_form = request.form.get('nomination_form')
 
-            conn = get_connection()
-            cursor = conn.cursor()
+            with db.cursor(dictionary=False) as (cursor, conn):
+                # 🔒 company + application fan-out commit (or roll back) together
+                conn.start_transaction()
 
-            cursor.execute("""
-                INSERT INTO companies
-                (name, job_description, job_type, package,
-                 drive_date, location, selection_process, nomination_form)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-            """, (
-                name,
-                job_description,
-                job_type,
-                package,
-                drive_date,
-                location,
-                json.dumps(selection_process),
-                nomination_form
-            ))
-
-            cursor.execute("""
-                SELECT registration_number, name, cgpa, backlogs, section, specialization
-                FROM students
-            """)
-            students = cursor.fetchall()
-
-            for reg_no, student_name, cgpa, backlogs, section, specialization in students:
                 cursor.execute("""
-                    INSERT INTO applications
-                    (registration_number, student_name, cgpa, backlogs,
-                     company_name, section, specialization, eligible, applied)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,'No','No')
+                    INSERT INTO companies
+                    (name, job_description, job_type, package,
+                     drive_date, location, selection_process, nomination_form)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
                 """, (
-                    reg_no,
-                    student_name,
-                    cgpa,
-                    backlogs,
                     name,
-                    section,
-                    specialization
+                    job_description,
+                    job_type,
+                    package,
+                    drive_date,
+                    location,
+                    json.dumps(selection_process),
+                    nomination_form
                 ))
 
-            conn.commit()
-            cursor.close()
-            conn.close()
+                company_id = cursor.lastrowid
+                save_company_rounds(cursor, company_id, selection_process)
+
+                # one INSERT ... SELECT instead of one INSERT per student
+                add_company_to_applications(cursor, company_id, name)
+
+                conn.commit()
+                mark_data_changed()
 
             flash("✅ Company added successfully", "success")
             return redirect(url_for('admin_companies'))
@@ -868,47 +729,34 @@ def admin_add_company():
 
 @app.route('/admin/set-eligibility/<int:company_id>', methods=['GET', 'POST'])
 def set_eligibility(company_id):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT * FROM companies WHERE id=%s", (company_id,))
-    company = cursor.fetchone()
+    with db.cursor() as (cursor, conn):
+        cursor.execute("SELECT * FROM companies WHERE id=%s", (company_id,))
+        company = cursor.fetchone()
 
-    if request.method == 'POST':
-        min_cgpa = float(request.form.get('cgpa', 0))
-        max_backlogs = int(request.form.get('backlogs', 0))
+        if request.method == 'POST':
+            min_cgpa = float(request.form.get('cgpa', 0))
+            max_backlogs = int(request.form.get('backlogs', 0))
 
-        eligibility_json = json.dumps({
-            "cgpa": min_cgpa,
-            "backlogs": max_backlogs
-        })
+            eligibility_json = json.dumps({
+                "cgpa": min_cgpa,
+                "backlogs": max_backlogs
+            })
 
-        # Save criteria
-        cursor.execute(
-            "UPDATE companies SET eligibility=%s WHERE id=%s",
-            (eligibility_json, company_id)
-        )
+            # Save criteria
+            conn.start_transaction()
+            cursor.execute(
+                "UPDATE companies SET eligibility=%s, min_cgpa=%s, max_backlogs=%s WHERE id=%s",
+                (eligibility_json, min_cgpa, max_backlogs, company_id)
+            )
 
-        # 🔥 Apply eligibility
-        cursor.execute("""
-            UPDATE applications a
-            JOIN students s
-              ON a.registration_number = s.registration_number
-            SET a.eligible =
-                CASE
-                    WHEN s.cgpa >= %s AND s.backlogs <= %s
-                    THEN 'Yes'
-                    ELSE 'No'
-                END
-            WHERE a.company_name = %s
-        """, (min_cgpa, max_backlogs, company['name']))
+            # 🔥 Apply eligibility: only flags that flip are written, company_stats gets the deltas
+            changed = eligibility_engine.reevaluate_company(cursor, company_id)
 
-        conn.commit()
-        flash("✅ Eligibility evaluated successfully", "success")
-        return redirect(url_for('admin_companies'))
+            conn.commit()
+            mark_data_changed()
+            flash(f"✅ Eligibility evaluated successfully ({changed} applications changed)", "success")
+            return redirect(url_for('admin_companies'))
 
-    cursor.close()
-    conn.close()
     return render_template("set_eligibility.html", company=company)
 
 
@@ -919,7 +767,7 @@ def upload_students():
 
     # 🔹 STEP 1: HANDLE GET (OPEN PAGE)
     if request.method == 'GET':
-        return render_template('upload_students.html')
+        return render_template('upload_students.html', job_id=request.args.get('job', type=int))
 
     # 🔹 STEP 2: HANDLE POST (UPLOAD FILE)
     if 'file' not in request.files or request.files['file'].filename == '':
@@ -933,31 +781,15 @@ def upload_students():
         flash("❌ Invalid file type. Only CSV/Excel allowed.", "danger")
         return redirect(url_for('upload_students'))
 
-    save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(save_path)
-
-    try:
-        result = bulk_add_students(save_path)
-
-        if result.get('failed', 0) == 0:
-            flash(
-                f"✅ Students added successfully! Inserted: {result.get('inserted', 0)}",
-                "success"
-            )
-        else:
-            flash(
-                f"⚠️ Inserted: {result.get('inserted', 0)}, Failed: {result.get('failed', 0)}",
-                "warning"
-            )
-
-    except Exception as e:
-        flash(f"❌ Error importing students: {e}", "danger")
-
-    finally:
-        if os.path.exists(save_path):
-            os.remove(save_path)
+    # 📥 Import runs in the background; poll /admin/jobs/<id> for progress
+    save_path = save_upload_for_job(file)
+    job_id = jobs.submit(
+        "students", bulk_add_students, save_path,
+        file_name=filename, cleanup_path=save_path
+    )
+    flash(f"⏳ Student import queued (job #{job_id})", "info")
 
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('upload_students', job=job_id))
 
 
 
@@ -966,8 +798,6 @@ def upload_students():
 # --------------------------------------
 # ADD SINGLE STUDENT - PAGE
 # --------------------------------------
-from db_connection import get_cursor, get_connection
-
 @app.route('/admin/add-student', methods=['GET'])
 def add_student():
     return render_template('add_student.html')
@@ -987,44 +817,33 @@ def save_student():
         flash("❌ Registration Number & Name are required.", "danger")
         return redirect(url_for('add_student'))
 
-    cursor, conn = None, None
+    sql = """
+        INSERT INTO students (
+            registration_number, name, email, phone, course, section, specialization,
+            semester, marks_10th, marks_12th, department, cgpa, backlogs,
+            current_stage, status, roll_no
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
 
     try:
-        cursor, conn = get_cursor()
-
-        sql = """
-            INSERT INTO students (
-                registration_number, name, email, phone, course, section, specialization,
-                semester, marks_10th, marks_12th, department, cgpa, backlogs,
-                current_stage, status, roll_no
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        cursor.execute(sql, tuple(data.values()))
-        conn.commit()
+        # the pooled connection is rolled back and returned even if the insert fails
+        with db.cursor() as (cursor, conn):
+            cursor.execute(sql, tuple(data.values()))
+            conn.commit()
+            invalidate_profile("student", data['email'])
+            mark_data_changed()
 
         flash("✅ Student added successfully!", "success")
         return redirect(url_for('admin_dashboard'))
 
     except mysql.connector.errors.IntegrityError:
         flash("⚠️ Student with this Registration Number already exists.", "warning")
-        if conn:
-            conn.rollback()
         return redirect(url_for('add_student'))
 
     except Exception as e:
         flash(f"❌ Error adding student: {str(e)}", "danger")
-        if conn:
-            conn.rollback()
         return redirect(url_for('add_student'))
 
-    finally:
-        try:
-            if cursor: cursor.close()
-            if conn: conn.close()
-        except:
-            pass
-
 
 # ---------------- ADMIN: Add Tutor ----------------
 @app.route('/admin/add-tutor', methods=['GET', 'POST'])
@@ -1038,36 +857,45 @@ def add_tutor():
         specialization = request.form.get('specialization')
         strength = request.form.get('strength')
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("""
-                INSERT INTO tutors (name, email, program, semester, section, specialization, strength)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (name, email, program, semester, section, specialization, strength))
-            conn.commit()
-            flash("✅ Tutor added successfully.", "success")
-        except Exception as e:
-            conn.rollback()
-            flash(f"❌ Failed to add tutor: {e}", "danger")
-        finally:
-            cursor.close()
-            conn.close()
+        with db.cursor(dictionary=False) as (cursor, conn):
+            try:
+                cursor.execute("""
+                    INSERT INTO tutors (name, email, program, semester, section, specialization, strength)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (name, email, program, semester, section, specialization, strength))
+                conn.commit()
+                invalidate_profile("tutor", email)
+                flash("✅ Tutor added successfully.", "success")
+            except Exception as e:
+                conn.rollback()
+                flash(f"❌ Failed to add tutor: {e}", "danger")
         return redirect(url_for('add_tutor'))
     return render_template('add_tutor.html')
 
 
+# ---------------- REQUEST IDENTITY: logged-in tutor / student ----------------
+def current_tutor():
+    """tutors row for the session, loaded once per request (and cached across requests)."""
+    if 'tutor' not in g:
+        g.tutor = get_profile("tutor", session.get('tutor_email'))
+    return g.tutor
+
+
+def current_student():
+    """students row for the session, loaded once per request (and cached across requests)."""
+    if 'student' not in g:
+        g.student = get_profile("student", session.get('student_email'))
+    return g.student
+
+
 # ---------------- TUTOR LOGIN ----------------
 @app.route('/tutor/login', methods=['GET', 'POST'])
 def tutor_login():
     if request.method == 'POST':
         email = request.form.get('email')
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM tutors WHERE email=%s", (email,))
-        tutor = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with db.cursor() as (cursor, conn):
+            cursor.execute("SELECT * FROM tutors WHERE email=%s", (email,))
+            tutor = cursor.fetchone()
 
         if tutor:
             session['tutor_id'] = tutor.get('id')
@@ -1089,28 +917,18 @@ def tutor_dashboard():
         flash("Please login first", "warning")
         return redirect(url_for('tutor_login'))
 
-    tutor_email = session.get('tutor_email')
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT * FROM tutors WHERE email=%s", (tutor_email,))
-    tutor = cursor.fetchone()
-
+    tutor = current_tutor()
     if not tutor:
-        cursor.close()
-        conn.close()
         flash("Tutor not found", "danger")
         return redirect(url_for('tutor_login'))
 
-    cursor.execute("""
-        SELECT * FROM students
-        WHERE section = %s AND specialization = %s
-        ORDER BY name ASC
-    """, (tutor.get('section'), tutor.get('specialization')))
-    students = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+    with read_cursor() as (cursor, conn):
+        cursor.execute("""
+            SELECT * FROM students
+            WHERE section = %s AND specialization = %s
+            ORDER BY name ASC
+        """, (tutor.get('section'), tutor.get('specialization')))
+        students = cursor.fetchall()
     return render_template('tutor_dashboard.html', tutor=tutor, students=students)
 
 
@@ -1120,14 +938,10 @@ def tutor_dashboard():
 def tutor_companies():
     if 'tutor_email' not in session:
         return redirect(url_for('tutor_login'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM tutors WHERE email=%s", (session.get('tutor_email'),))
-    tutor = cursor.fetchone()
-    cursor.execute("SELECT * FROM companies ORDER BY drive_date DESC")
-    companies = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    tutor = current_tutor()
+    with read_cursor() as (cursor, conn):
+        cursor.execute("SELECT * FROM companies ORDER BY drive_date DESC")
+        companies = cursor.fetchall()
     return render_template('tutor_companies.html', tutor=tutor, companies=companies)
 
 
@@ -1138,38 +952,33 @@ def tutor_company_rounds(company_id):
         flash("⚠️ Please login first", "warning")
         return redirect(url_for('tutor_login'))
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Fetch uploaded round files for this company
-    cursor.execute("""
-        SELECT id, round_number, file_name, file_path, uploaded_at
-        FROM uploaded_round_files
-        WHERE company_id = %s
-        ORDER BY round_number ASC, uploaded_at DESC
-    """, (company_id,))
-    uploaded_files = cursor.fetchall()
-
-    # Normalize file_path and create a download URL for each file
-    for f in uploaded_files:
-        raw = (f.get('file_path') or "").replace("\\", "/").lstrip("/")
+    with read_cursor() as (cursor, conn):
+        # Fetch uploaded round files for this company
+        cursor.execute("""
+            SELECT id, round_number, file_name, file_path, uploaded_at
+            FROM uploaded_round_files
+            WHERE company_id = %s
+            ORDER BY round_number ASC, uploaded_at DESC
+        """, (company_id,))
+        uploaded_files = cursor.fetchall()
 
-        # Remove leading 'static/' if accidentally stored
-        if raw.startswith("static/"):
-            raw = raw[len("static/"):]
+        # Normalize file_path and create a download URL for each file
+        for f in uploaded_files:
+            raw = (f.get('file_path') or "").replace("\\", "/").lstrip("/")
 
-        # Store normalized path
-        f['file_path'] = raw
+            # Remove leading 'static/' if accidentally stored
+            if raw.startswith("static/"):
+                raw = raw[len("static/"):]
 
-        # Create the download URL using the /uploads/<filename> route
-        f['download_url'] = url_for('uploaded_file', filename=raw)
+            # Store normalized path
+            f['file_path'] = raw
 
-    # Fetch company info
-    cursor.execute("SELECT * FROM companies WHERE id = %s", (company_id,))
-    company = cursor.fetchone()
+            # Create the download URL using the /uploads/<filename> route
+            f['download_url'] = url_for('uploaded_file', filename=raw)
 
-    cursor.close()
-    conn.close()
+        # Fetch company info
+        cursor.execute("SELECT * FROM companies WHERE id = %s", (company_id,))
+        company = cursor.fetchone()
 
     # Pass company and files to template
     return render_template(
@@ -1178,6 +987,152 @@ def tutor_company_rounds(company_id):
         uploaded_files=uploaded_files
     )
 
+# ---------------- TUTOR: view round results / uploaded round files ----------------
+ROUND_ROW_STATUSES = ('Passed', 'Failed')
+
+
+def _round_rows_page(cursor, table, where, params, sort_column):
+    """
+    One page of round rows (company_shortlist or round_file_rows) from the typed
+    tables — never the raw sheet. ?status=Passed|Failed, ?q=<reg no / name prefix>,
+    keyset pagination on the unique sort_column via ?after=<token>.
+    """
+    filters = {}
+    where, params = list(where), list(params)
+    if request.args.get('status') in ROUND_ROW_STATUSES:
+        filters['status'] = request.args['status']
+        where.append("status = %s")
+        params.append(filters['status'])
+    q = request.args.get('q', '').strip()
+    if q:
+        filters['q'] = q
+        where.append("(registration_number LIKE %s OR student_name LIKE %s)")
+        params += [q.replace('%', r'\%').replace('_', r'\_') + '%'] * 2
+
+    per_page = page_size(request.args.get('per_page'), default=100, maximum=500)
+    after = decode_cursor(request.args.get('after'), 1)
+    if after:
+        where.append(f"{sort_column} > %s")
+        params.append(after[0])
+
+    cursor.execute(f"""
+        SELECT {sort_column} AS sort_key, registration_number AS student_regno,
+               student_name AS name, email, branch, year, status
+        FROM {table}
+        WHERE {' AND '.join(where)}
+        ORDER BY {sort_column}
+        LIMIT %s
+    """, (*params, per_page + 1))
+    rows = cursor.fetchall()
+
+    pagination = {'per_page': per_page, 'filters': filters, 'next': None, 'first': bool(after)}
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        pagination['next'] = encode_cursor([rows[-1]['sort_key']])
+    return rows, pagination
+
+
+@app.route('/tutor/company/<int:company_id>/round-list')
+def tutor_round_list(company_id):
+    if 'tutor_email' not in session:
+        flash("⚠️ Please login first", "warning")
+        return redirect(url_for('tutor_login'))
+
+    with read_cursor() as (cursor, conn):
+        cursor.execute("""
+            SELECT c.*, r.round_number, r.round_name
+            FROM companies c
+            LEFT JOIN company_rounds r ON r.company_id = c.id
+            WHERE c.id = %s
+            ORDER BY r.round_number
+        """, (company_id,))
+        grouped = group_rounds(cursor.fetchall())
+        if not grouped:
+            flash("Company not found", "danger")
+            return redirect(url_for('tutor_companies'))
+        company = grouped[0]
+
+        # rounds with uploaded results but no company_rounds entry still get listed
+        cursor.execute("""
+            SELECT DISTINCT round_number FROM company_shortlist
+            WHERE company_id = %s ORDER BY round_number
+        """, (company_id,))
+        known = {r['round_number'] for r in company['rounds']}
+        extra = [{'round_number': r['round_number'], 'round_name': None}
+                 for r in cursor.fetchall() if r['round_number'] not in known]
+
+    rounds = sorted(company['rounds'] + extra, key=lambda r: r['round_number'])
+    return render_template('tutor_round_list.html', company=company, rounds=rounds)
+
+
+@app.route('/tutor/company/<int:company_id>/round/<int:round_number>/students')
+def tutor_view_round_students(company_id, round_number):
+    if 'tutor_email' not in session:
+        flash("⚠️ Please login first", "warning")
+        return redirect(url_for('tutor_login'))
+
+    with read_cursor() as (cursor, conn):
+        students, pagination = _round_rows_page(
+            cursor, "company_shortlist", ["company_id = %s", "round_number = %s"],
+            [company_id, round_number], "registration_number"
+        )
+
+    return render_template('tutor_round_students.html', company_id=company_id,
+                           round_number=round_number, students=students, pagination=pagination,
+                           page_url=url_for('tutor_view_round_students', company_id=company_id,
+                                            round_number=round_number))
+
+
+@app.route('/tutor/company/<int:company_id>/round-files')
+def tutor_round_files(company_id):
+    if 'tutor_email' not in session:
+        flash("⚠️ Please login first", "warning")
+        return redirect(url_for('tutor_login'))
+
+    with read_cursor() as (cursor, conn):
+        cursor.execute("SELECT id, name AS company_name FROM companies WHERE id = %s", (company_id,))
+        company = cursor.fetchone()
+        if not company:
+            flash("Company not found", "danger")
+            return redirect(url_for('tutor_companies'))
+        cursor.execute("""
+            SELECT id, round_number, file_name, file_path, uploaded_at, row_count
+            FROM uploaded_round_files
+            WHERE company_id = %s
+            ORDER BY round_number ASC, uploaded_at DESC
+        """, (company_id,))
+        round_files = cursor.fetchall()
+
+    return render_template('tutor_round_files.html', company=company, round_files=round_files)
+
+
+@app.route('/tutor/round-file/<int:file_id>')
+def tutor_view_round_file(file_id):
+    if 'tutor_email' not in session:
+        flash("⚠️ Please login first", "warning")
+        return redirect(url_for('tutor_login'))
+
+    with read_cursor() as (cursor, conn):
+        cursor.execute("""
+            SELECT id, company_id, round_number, file_name, row_count
+            FROM uploaded_round_files WHERE id = %s
+        """, (file_id,))
+        file_rec = cursor.fetchone()
+        if not file_rec:
+            flash("❌ File record not found.", "danger")
+            return redirect(request.referrer or url_for('tutor_companies'))
+        students, pagination = _round_rows_page(
+            cursor, "round_file_rows", ["file_id = %s"], [file_id], "line_no"
+        )
+
+    if file_rec['row_count'] is None:
+        flash("⏳ This file has not been processed yet.", "info")
+    return render_template('tutor_round_students.html', company_id=file_rec['company_id'],
+                           round_number=file_rec['round_number'], file=file_rec,
+                           students=students, pagination=pagination,
+                           page_url=url_for('tutor_view_round_file', file_id=file_id))
+
+
 # ---------------- TUTOR: Download a round file by its DB id ----------------
 @app.route("/tutor/download_round_file/<int:file_id>")
 def tutor_download_round_file(file_id):
@@ -1185,14 +1140,9 @@ def tutor_download_round_file(file_id):
         flash("⚠️ Please login first", "warning")
         return redirect(url_for('tutor_login'))
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
+    with db.cursor() as (cursor, conn):
         cursor.execute("SELECT * FROM uploaded_round_files WHERE id = %s", (file_id,))
         file_rec = cursor.fetchone()
-    finally:
-        cursor.close()
-        conn.close()
 
     if not file_rec:
         flash("❌ File record not found.", "danger")
@@ -1203,35 +1153,24 @@ def tutor_download_round_file(file_id):
     if relative_path.startswith("static/"):
         relative_path = relative_path[len("static/"):]
 
-    full_path = os.path.join(app.config['UPLOAD_FOLDER'], relative_path)
-
-    if not os.path.exists(full_path):
+    # 📦 ETag / 304 / Range, or handed to the proxy (FILE_OFFLOAD)
+    response = send_upload(app.config['UPLOAD_FOLDER'], relative_path)
+    if response is None:
         flash("❌ File not found on server.", "danger")
         return redirect(request.referrer or url_for('tutor_company_rounds', company_id=file_rec.get('company_id')))
-
-    directory = os.path.dirname(full_path)
-    filename = os.path.basename(full_path)
-    return send_from_directory(directory, filename, as_attachment=True)
+    return response
 
 
 # ---------------- Serve uploaded file (download) ----------------
 # ---------------- Serve uploaded file (download) ----------------
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    # Normalize path
-    safe_filename = filename.replace("..", "").replace("\\", "/").lstrip("/")
-    
-    # Full path on disk
-    full_path = os.path.join(app.config['UPLOAD_FOLDER'], safe_filename)
-    
-    if not os.path.exists(full_path):
+    # send_upload keeps the path inside UPLOAD_FOLDER (404 otherwise)
+    response = send_upload(app.config['UPLOAD_FOLDER'], filename)
+    if response is None:
         flash("❌ File not found on server.", "danger")
         return redirect(request.referrer or url_for('tutor_companies'))
-    
-    directory = os.path.dirname(full_path)
-    file_name = os.path.basename(full_path)
-    
-    return send_from_directory(directory, file_name, as_attachment=True)
+    return response
 
 
 
@@ -1244,36 +1183,40 @@ def tutor_update_applied(company_id, student_id):
         return redirect(url_for('tutor_login'))
 
     applied_value = request.form.get('applied', 'No')
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT registration_number, name FROM students WHERE id=%s", (student_id,))
-        student = cursor.fetchone()
-        cursor.execute("SELECT name FROM companies WHERE id=%s", (company_id,))
-        company = cursor.fetchone()
-        if not student or not company:
-            flash("❌ Invalid student or company", "danger")
-            return redirect(url_for('tutor_company_status', company_id=company_id))
-
-        reg_no = student.get('registration_number')
-        company_name = company.get('name')
-
-        cursor.execute("SELECT * FROM applications WHERE registration_number=%s AND company_name=%s", (reg_no, company_name))
-        record = cursor.fetchone()
-        if record:
-            cursor.execute("UPDATE applications SET applied=%s WHERE registration_number=%s AND company_name=%s",
-                           (applied_value, reg_no, company_name))
-        else:
-            cursor.execute("INSERT INTO applications (registration_number, student_name, company_name, applied, eligible) VALUES (%s,%s,%s,%s,%s)",
-                           (reg_no, student.get('name'), company_name, applied_value, 'No'))
-        conn.commit()
-        flash("✅ Applied status updated.", "success")
-    except Exception as e:
-        conn.rollback()
-        flash(f"❌ Error updating applied status: {e}", "danger")
-    finally:
-        cursor.close()
-        conn.close()
+    with db.cursor() as (cursor, conn):
+        try:
+            cursor.execute("SELECT registration_number, name FROM students WHERE id=%s", (student_id,))
+            student = cursor.fetchone()
+            cursor.execute("SELECT name FROM companies WHERE id=%s", (company_id,))
+            company = cursor.fetchone()
+            if not student or not company:
+                flash("❌ Invalid student or company", "danger")
+                return redirect(url_for('tutor_company_status', company_id=company_id))
+
+            conn.start_transaction()
+            cursor.execute("SELECT applied FROM applications WHERE student_id=%s AND company_id=%s FOR UPDATE",
+                           (student_id, company_id))
+            record = cursor.fetchone()
+            now_applied = int(applied_value == 'Yes')
+            if record:
+                cursor.execute("UPDATE applications SET applied=%s WHERE student_id=%s AND company_id=%s",
+                               (applied_value, student_id, company_id))
+                was_applied = int(record.get('applied') == 'Yes')
+                bump_company_stats(cursor, company_id, applied=now_applied - was_applied)
+            else:
+                cursor.execute("""
+                    INSERT INTO applications
+                    (student_id, company_id, registration_number, student_name, company_name, applied, eligible)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s)
+                """, (student_id, company_id, student.get('registration_number'), student.get('name'),
+                      company.get('name'), applied_value, 'No'))
+                bump_company_stats(cursor, company_id, total=1, applied=now_applied)
+            conn.commit()
+            mark_data_changed()
+            flash("✅ Applied status updated.", "success")
+        except Exception as e:
+            conn.rollback()
+            flash(f"❌ Error updating applied status: {e}", "danger")
     return redirect(url_for('tutor_company_status', company_id=company_id))
 
 
@@ -1283,85 +1226,110 @@ def tutor_company_status(company_id):
     if 'tutor_email' not in session:
         flash("⚠️ Please login first!", "warning")
         return redirect(url_for('tutor_login'))
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT * FROM tutors WHERE email=%s", (session.get('tutor_email'),))
-    tutor = cursor.fetchone()
+    tutor = current_tutor()
     if not tutor:
-        cursor.close()
-        conn.close()
         flash("Tutor not found", "danger")
         return redirect(url_for('tutor_login'))
-    cursor.execute("SELECT * FROM companies WHERE id=%s", (company_id,))
-    company = cursor.fetchone()
-    if not company:
-        cursor.close()
-        conn.close()
-        flash("Company not found", "danger")
-        return redirect(url_for('tutor_companies'))
-
-    sql = """
-        SELECT
-            s.id AS student_id,
-            s.registration_number,
-            s.name,
-            s.email,
-            s.cgpa,
-            s.backlogs,
-            COALESCE(a.applied, 'No') AS applied,
-            COALESCE(a.eligible, 'No') AS eligible
-        FROM students s
-        LEFT JOIN applications a
-          ON a.registration_number = s.registration_number
-          AND a.company_name = %s
-        WHERE s.section = %s AND s.specialization = %s
-        ORDER BY s.name ASC
-    """
-    cursor.execute(sql, (company['name'], tutor.get('section'), tutor.get('specialization')))
-    rows = cursor.fetchall()
-
-    students = []
-    counts = {'total': 0, 'eligible': 0, 'not_eligible': 0, 'applied': 0, 'not_applied': 0}
-    for r in rows:
-        counts['total'] += 1
-        applied = r.get('applied') or 'No'
-        eligible = r.get('eligible') or 'No'
-        if eligible == 'Yes':
-            counts['eligible'] += 1
-        else:
-            counts['not_eligible'] += 1
-        if applied == 'Yes':
-            counts['applied'] += 1
-        else:
-            counts['not_applied'] += 1
-
-        if applied == 'Yes' and eligible == 'Yes':
-            status = "Applied — Eligible"
-        elif applied == 'Yes' and eligible != 'Yes':
-            status = "Applied — Not Eligible"
-        elif applied != 'Yes' and eligible == 'Yes':
-            status = "Eligible — Not Applied"
-        else:
-            status = "Not Applied"
-        r['application_status'] = status
-        students.append(r)
-
-    class_strength = tutor.get('strength')
+    with read_cursor() as (cursor, conn):
+        cursor.execute("SELECT * FROM companies WHERE id=%s", (company_id,))
+        company = cursor.fetchone()
+        if not company:
+            flash("Company not found", "danger")
+            return redirect(url_for('tutor_companies'))
 
-    cursor.close()
-    conn.close()
+        section, specialization = tutor.get('section'), tutor.get('specialization')
 
+        # 📊 counts for the whole section in one aggregate (independent of paging/filters)
+        cursor.execute("""
+            SELECT
+                COUNT(*) AS total_students,
+                COALESCE(SUM(a.eligible = 'Yes'), 0) AS eligible_students,
+                COALESCE(SUM(a.applied = 'Yes'), 0) AS applied_students
+            FROM students s
+            LEFT JOIN applications a
+              ON a.student_id = s.id
+              AND a.company_id = %s
+            WHERE s.section = %s AND s.specialization = %s
+        """, (company_id, section, specialization))
+        counts = cursor.fetchone()
+
+        # 🔎 filters: ?eligible=Yes|No&applied=Yes|No
+        filters = {k: request.args.get(k) for k in ('eligible', 'applied')
+                   if request.args.get(k) in ('Yes', 'No')}
+        where = ["s.section = %s", "s.specialization = %s"]
+        params = [company_id, section, specialization]
+        for column, value in filters.items():
+            if value == 'Yes':
+                where.append(f"a.{column} = 'Yes'")
+            else:
+                where.append(f"(a.{column} IS NULL OR a.{column} <> 'Yes')")
+
+        # 📄 keyset pagination on (name, id): ?after=<token> / ?before=<token>
+        per_page = page_size(request.args.get('per_page'))
+        after = decode_cursor(request.args.get('after'), 2)
+        before = decode_cursor(request.args.get('before'), 2)
+        order = "ASC"
+        if after:
+            where.append("(s.name > %s OR (s.name = %s AND s.id > %s))")
+            params += [after[0], after[0], after[1]]
+        elif before:
+            where.append("(s.name < %s OR (s.name = %s AND s.id < %s))")
+            params += [before[0], before[0], before[1]]
+            order = "DESC"
+
+        cursor.execute(f"""
+            SELECT
+                s.id AS student_id,
+                s.registration_number,
+                s.name,
+                s.email,
+                s.cgpa,
+                s.backlogs,
+                COALESCE(a.applied, 'No') AS applied,
+                COALESCE(a.eligible, 'No') AS eligible,
+                CASE
+                    WHEN a.applied = 'Yes' AND a.eligible = 'Yes' THEN 'Applied — Eligible'
+                    WHEN a.applied = 'Yes' THEN 'Applied — Not Eligible'
+                    WHEN a.eligible = 'Yes' THEN 'Eligible — Not Applied'
+                    ELSE 'Not Applied'
+                END AS application_status
+            FROM students s
+            LEFT JOIN applications a
+              ON a.student_id = s.id
+              AND a.company_id = %s
+            WHERE {' AND '.join(where)}
+            ORDER BY s.name {order}, s.id {order}
+            LIMIT %s
+        """, (*params, per_page + 1))
+        students = cursor.fetchall()
+
+    has_more = len(students) > per_page
+    students = students[:per_page]
+    if order == "DESC":
+        students.reverse()
+
+    pagination = {'per_page': per_page, 'filters': filters, 'next': None, 'prev': None}
+    if students:
+        first, last = students[0], students[-1]
+        if has_more or before:
+            pagination['next'] = encode_cursor([last['name'], last['student_id']])
+        if (has_more and before) or after:
+            pagination['prev'] = encode_cursor([first['name'], first['student_id']])
+
+    total = int(counts['total_students'] or 0)
+    eligible = int(counts['eligible_students'] or 0)
+    applied = int(counts['applied_students'] or 0)
     stats = {
-        'total_students': counts['total'],
-        'eligible_students': counts['eligible'],
-        'not_eligible_students': counts['not_eligible'],
-        'applied_students': counts['applied'],
-        'not_applied_students': counts['not_applied'],
-        'class_strength': class_strength
+        'total_students': total,
+        'eligible_students': eligible,
+        'not_eligible_students': total - eligible,
+        'applied_students': applied,
+        'not_applied_students': total - applied,
+        'class_strength': tutor.get('strength')
     }
 
-    return render_template('tutor_company_status.html', tutor=tutor, company=company, students=students, stats=stats)
+    return render_template('tutor_company_status.html', tutor=tutor, company=company,
+                           students=students, stats=stats, pagination=pagination)
 
 @app.route('/student/signup', methods=['GET', 'POST'])
 def student_signup():
@@ -1378,35 +1346,27 @@ def student_signup():
             flash("Passwords do not match", "danger")
             return redirect(url_for('student_signup'))
 
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
+        with db.cursor() as (cursor, conn):
+            # student must exist
+            cursor.execute("SELECT * FROM students WHERE email=%s", (email,))
+            student = cursor.fetchone()
 
-        # student must exist
-        cursor.execute("SELECT * FROM students WHERE email=%s", (email,))
-        student = cursor.fetchone()
+            if not student:
+                flash("Email not found in student records", "danger")
+                return redirect(url_for('student_signup'))
 
-        if not student:
-            flash("Email not found in student records", "danger")
-            cursor.close()
-            conn.close()
-            return redirect(url_for('student_signup'))
-
-        # already registered
-        cursor.execute("SELECT * FROM student_auth WHERE email=%s", (email,))
-        if cursor.fetchone():
-            flash("Account already exists. Please login.", "warning")
-            cursor.close()
-            conn.close()
-            return redirect(url_for('student_login'))
+            # already registered
+            cursor.execute("SELECT * FROM student_auth WHERE email=%s", (email,))
+            if cursor.fetchone():
+                flash("Account already exists. Please login.", "warning")
+                return redirect(url_for('student_login'))
 
-        cursor.execute(
-            "INSERT INTO student_auth (email, password) VALUES (%s,%s)",
-            (email, password)
-        )
+            cursor.execute(
+                "INSERT INTO student_auth (email, password) VALUES (%s,%s)",
+                (email, password)
+            )
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
 
         flash("Signup successful. Please login.", "success")
         return redirect(url_for('student_login'))
@@ -1425,27 +1385,25 @@ def student_login():
             flash("Email and password are required", "danger")
             return redirect(url_for('student_login'))
 
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT 
-                s.registration_number,
-                s.name,
-                s.email
-            FROM student_auth a
-            JOIN students s ON a.email = s.email
-            WHERE a.email = %s AND a.password = %s
-        """, (email, password))
+        with db.cursor() as (cursor, conn):
+            cursor.execute("""
+                SELECT 
+                    s.id,
+                    s.registration_number,
+                    s.name,
+                    s.email
+                FROM student_auth a
+                JOIN students s ON a.email = s.email
+                WHERE a.email = %s AND a.password = %s
+            """, (email, password))
 
-        student = cursor.fetchone()
-        cursor.close()
-        conn.close()
+            student = cursor.fetchone()
 
         if student:
             session.clear()   # 🔥 prevents old session conflicts
             session['student_email'] = student['email']
             session['student_reg'] = student['registration_number']
+            session['student_id'] = student['id']
             session['student_name'] = student['name']
 
             flash("Login successful", "success")
@@ -1465,17 +1423,7 @@ def student_dashboard():
         flash("Please login to continue", "warning")
         return redirect(url_for('student_login'))
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(
-        "SELECT * FROM students WHERE email = %s",
-        (session['student_email'],)
-    )
-    student = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
+    student = current_student()
 
     # ❌ If student record not found
     if not student:
@@ -1499,56 +1447,50 @@ def student_logout():
 
 import json
 
+def current_student_id():
+    """students.id of the logged-in student (looked up once for sessions that predate student_id)."""
+    if 'student_id' not in session:
+        student = current_student()
+        session['student_id'] = student['id'] if student else None
+    return session['student_id']
+
+
 @app.route('/student/companies')
 def student_companies():
     if 'student_reg' not in session:
         flash("Please login to continue", "warning")
         return redirect(url_for('student_login'))
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT
-            c.id AS company_id,
-            c.name AS company_name,
-            c.job_description,
-            c.selection_process,
-            c.job_type,
-            c.package,
-            c.location,
-            c.drive_date,
-            c.nomination_form,
-            a.eligible,
-            a.applied
-        FROM applications a
-        JOIN companies c
-          ON a.company_name = c.name
-        WHERE a.registration_number = %s
-        ORDER BY c.drive_date DESC
-    """, (session['student_reg'],))
-
-    companies = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    # 🔥 PARSE selection_process HERE (NOT IN JINJA)
+    student_id = current_student_id()
+    with read_cursor() as (cursor, conn):
+        cursor.execute("""
+            SELECT
+                c.id AS company_id,
+                c.name AS company_name,
+                c.job_description,
+                c.job_type,
+                c.package,
+                c.location,
+                c.drive_date,
+                c.nomination_form,
+                a.eligible,
+                a.applied,
+                r.round_number,
+                r.round_name
+            FROM applications a
+            JOIN companies c
+              ON a.company_id = c.id
+            LEFT JOIN company_rounds r
+              ON r.company_id = c.id
+            WHERE a.student_id = %s
+            ORDER BY c.drive_date DESC, c.id, r.round_number
+        """, (student_id,))
+
+        # 🔥 rounds come from company_rounds, folded per company (no JSON parsing)
+        companies = group_rounds(cursor.fetchall(), key='company_id')
+
     for c in companies:
-        sp = c.get('selection_process')
-        if sp:
-            try:
-                parsed = json.loads(sp)
-                if isinstance(parsed, list):
-                    c['selection_process_list'] = parsed
-                else:
-                    c['selection_process_list'] = [sp]
-            except Exception:
-                # fallback for comma separated text
-                c['selection_process_list'] = [
-                    x.strip() for x in sp.split(',') if x.strip()
-                ]
-        else:
-            c['selection_process_list'] = []
+        c['selection_process_list'] = [r['round_name'] for r in c['rounds']]
 
     return render_template(
         'student_companies.html',
@@ -1557,31 +1499,132 @@ def student_companies():
 
 
 
-@app.route('/student/apply/<company_name>', methods=['POST'])
-def student_apply(company_name):
+@app.route('/student/apply/<int:company_id>', methods=['POST'])
+def student_apply(company_id):
     if 'student_reg' not in session:
         return redirect(url_for('student_login'))
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        UPDATE applications
-        SET applied='Yes'
-        WHERE registration_number=%s
-          AND company_name=%s
-          AND eligible='Yes'
-    """, (session['student_reg'], company_name))
+    student_id = current_student_id()
+    with db.cursor(dictionary=False) as (cursor, conn):
+        conn.start_transaction()
+        cursor.execute("""
+            UPDATE applications
+            SET applied='Yes'
+            WHERE student_id=%s
+              AND company_id=%s
+              AND eligible='Yes'
+              AND (applied IS NULL OR applied <> 'Yes')
+        """, (student_id, company_id))
+        bump_company_stats(cursor, company_id, applied=cursor.rowcount)
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        conn.commit()
+        mark_data_changed()
 
     flash("Applied successfully", "success")
     return redirect(url_for('student_companies'))
 
 
 
+# ---------------- CLI: reconcile company_stats ----------------
+@app.cli.command("rebuild-company-stats")
+def rebuild_company_stats_command():
+    """Recount company_stats from applications (flask --app main rebuild-company-stats)."""
+    with db.cursor(dictionary=False) as (cursor, conn):
+        conn.start_transaction()
+        refresh_company_stats(cursor)
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM company_stats")
+        print(f"✅ company_stats rebuilt for {cursor.fetchone()[0]} companies.")
+
+
+@app.cli.command("recompute-eligibility")
+def recompute_eligibility_command():
+    """Re-evaluate applications.eligible for every company in batches (flask --app main recompute-eligibility)."""
+    changed = eligibility_engine.recompute_all()
+    if changed:
+        mark_data_changed()
+    print(f"✅ Eligibility recomputed: {changed} applications changed.")
+
+
+@app.cli.command("cache-round-files")
+def cache_round_files_command():
+    """Parse uploaded round files that have no cached rows yet (flask --app main cache-round-files)."""
+    with db.cursor() as (cursor, conn):
+        cursor.execute("SELECT id, file_path FROM uploaded_round_files WHERE row_count IS NULL ORDER BY id")
+        pending = cursor.fetchall()
+        cached = 0
+        for f in pending:
+            relative_path = (f['file_path'] or "").replace("\\", "/").lstrip("/")
+            if relative_path.startswith("static/"):
+                relative_path = relative_path[len("static/"):]
+            try:
+                df, _ = read_round_results(os.path.join(app.config['UPLOAD_FOLDER'], relative_path))
+            except Exception as e:
+                print(f"⚠️ File #{f['id']} skipped: {e}")
+                continue
+            conn.start_transaction()
+            cache_round_file(cursor, f['id'], df)
+            conn.commit()
+            cached += 1
+    print(f"✅ Cached rows for {cached} of {len(pending)} round files.")
+
+
+# ---------------- CLI: schema migrations ----------------
+@app.cli.command("migrate")
+def migrate_command():
+    """Apply pending schema migrations (flask --app main migrate). Run once per deploy."""
+    applied = migrations.run_migrations()
+    if applied:
+        print(f"✅ Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print("✅ Schema is up to date.")
+
+
+@app.cli.command("build-ai-schema")
+def build_ai_schema_command():
+    """Rebuild the AI agent's pruned schema snapshot on disk (flask --app main build-ai-schema)."""
+    import ai_schema
+    from portal_ai import get_engine
+    try:
+        ai_schema.clear_snapshot()
+        tables = ai_schema.get_snapshot(get_engine())
+        print(f"✅ AI schema snapshot written for: {', '.join(tables)}")
+    except Exception as e:
+        # not fatal for a deploy: the first AI question builds it instead
+        print("⚠️ build-ai-schema error:", e)
+
+
+@app.cli.command("check-replica")
+def check_replica_command():
+    """Show where reads and writes are routed (flask --app main check-replica)."""
+    if db.REPLICA_CONFIG is None:
+        print("ℹ️ DB_REPLICA_URL is not set: all reads use the primary.")
+        return
+    with db.cursor(dictionary=False) as (cursor, conn):
+        cursor.execute("SELECT @@hostname, @@port")
+        print("✍️ writes  -> %s:%s" % cursor.fetchone())
+    with db.read_cursor(dictionary=False) as (cursor, conn):
+        cursor.execute("SELECT @@hostname, @@port")
+        print("📖 reads   -> %s:%s" % cursor.fetchone())
+    print(f"⏱️ replica lag: {db.replica_lag()} s (max {db.REPLICA_MAX_LAG:.0f} s)")
+    print(f"📊 {db.pool_stats()['replica']}")
+
+
+@app.cli.command("check-indexes")
+def check_indexes_command():
+    """Report hot-path indexes missing from the live schema (flask --app main check-indexes)."""
+    with db.cursor(dictionary=False) as (cursor, conn):
+        pending = migrations.pending_versions(cursor)
+        missing = migrations.missing_indexes(cursor)
+    if pending:
+        print(f"⚠️ Pending migrations: {', '.join(str(v) for v in pending)}")
+    for table, name, columns in missing:
+        print(f"❌ {table}: missing {name} ({', '.join(columns)})")
+    if missing or pending:
+        sys.exit(1)
+    print("✅ All hot-path indexes present.")
+
+
 # ---------------- MAIN ----------------
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,154 @@
+# metrics.py
+import os
+import re
+import time
+import threading
+
+# ✅ In-process metrics in Prometheus text format (no client library needed).
+# Each gunicorn worker keeps its own numbers and /metrics answers for the worker
+# that serves the scrape; every sample carries a `pid` label so workers stay apart.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000, 5000)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+_LOCK = threading.Lock()
+_METRICS = []
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(base, key, extra=()):
+    pairs = list(base) + list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name, self.help = name, help_text
+        self._values = {}
+        _METRICS.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self, base=()):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(base, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name, self.help = name, help_text
+        self.buckets = tuple(buckets)
+        self._values = {}           # label key -> [bucket counts..., sum, count]
+        _METRICS.append(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with _LOCK:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self, base=()):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, data in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, data):
+                lines.append(f"{self.name}_bucket{_format_labels(base, key, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(base, key, [('le', '+Inf')])} {data[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(base, key)} {round(data[-2], 6)}")
+            lines.append(f"{self.name}_count{_format_labels(base, key)} {data[-1]}")
+        return lines
+
+
+# ----- metrics -----
+REQUESTS = Counter("tnp_http_requests_total", "HTTP requests by endpoint, method and status.")
+REQUEST_SECONDS = Histogram("tnp_http_request_duration_seconds", "Request latency by endpoint.")
+REQUEST_QUERIES = Histogram("tnp_http_request_queries", "SQL statements per request.", QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("tnp_http_request_db_seconds", "Time spent in SQL statements per request.")
+REQUEST_ROWS = Histogram("tnp_http_request_rows_fetched", "Rows returned by SQL per request.", ROW_BUCKETS)
+QUERIES = Counter("tnp_db_queries_total", "SQL statements by verb (requests and background work).")
+QUERY_SECONDS = Histogram("tnp_db_query_duration_seconds", "SQL statement latency by verb.")
+JOB_SECONDS = Histogram("tnp_job_duration_seconds", "Background upload job run time by kind and status.",
+                        JOB_BUCKETS)
+AI_SECONDS = Histogram("tnp_ai_answer_duration_seconds",
+                       "AI answers from the bounded pool (queue wait + run) by outcome.", JOB_BUCKETS)
+AI_AGENT_SECONDS = Histogram("tnp_ai_agent_duration_seconds", "LangChain SQL agent run time by outcome.",
+                             JOB_BUCKETS)
+
+_VERB = re.compile(r"^\s*(?:/\*.*?\*/\s*)?(\w+)", re.S)
+
+
+def statement_verb(statement):
+    """SELECT / INSERT / UPDATE / ... of a statement (bounded label values)."""
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode(errors="replace")
+    match = _VERB.match(statement or "")
+    return match.group(1).upper() if match else "OTHER"
+
+
+# ----- per-request accounting (one request per thread under gthread) -----
+_local = threading.local()
+
+
+def start_request():
+    _local.request = {"started": time.perf_counter(), "queries": 0, "db_seconds": 0.0, "rows": 0}
+
+
+def current_request():
+    """Counters of the request running on this thread, or None (background threads)."""
+    return getattr(_local, "request", None)
+
+
+def record_query(statement, seconds, rows):
+    """db_connection query hook: one call per executed statement."""
+    verb = statement_verb(statement)
+    QUERIES.inc(verb=verb)
+    QUERY_SECONDS.observe(seconds, verb=verb)
+    request = current_request()
+    if request is not None:
+        request["queries"] += 1
+        request["db_seconds"] += seconds
+        request["rows"] += rows
+
+
+def finish_request(endpoint, method, status):
+    """Record the request started on this thread (no-op if it was already recorded)."""
+    request = current_request()
+    if request is None:
+        return
+    _local.request = None
+    endpoint = endpoint or "unmatched"
+    REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+    REQUEST_SECONDS.observe(time.perf_counter() - request["started"], endpoint=endpoint)
+    REQUEST_QUERIES.observe(request["queries"], endpoint=endpoint)
+    REQUEST_DB_SECONDS.observe(request["db_seconds"], endpoint=endpoint)
+    REQUEST_ROWS.observe(request["rows"], endpoint=endpoint)
+
+
+def render(gauges=None):
+    """All metrics as Prometheus text; gauges is an optional {name: (help, value)} read at scrape time."""
+    base = (("pid", os.getpid()),)
+    lines = []
+    for name, (help_text, value) in (gauges or {}).items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge",
+                  f"{name}{_format_labels(base, ())} {value}"]
+    with _LOCK:
+        for metric in _METRICS:
+            lines += metric.render(base)
+    return "\n".join(lines) + "\n"
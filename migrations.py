@@ -0,0 +1,560 @@
+# migrations.py
+import logging
+
+import db_connection as db
+
+# ✅ Versioned schema migrations. Applied once per deploy (`flask --app main migrate`),
+# recorded in schema_migrations; every step is also safe to re-run.
+MIGRATION_LOCK = "tnp_schema_migrations"
+MIGRATION_LOCK_TIMEOUT = 300          # seconds to wait for a concurrent deploy's run
+
+
+# ----- information_schema helpers -----
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) AS n FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return _count(cursor.fetchone()) > 0
+
+
+def index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) AS n FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return _count(cursor.fetchone()) > 0
+
+
+def constraint_exists(cursor, table, constraint):
+    cursor.execute("""
+        SELECT COUNT(*) AS n FROM information_schema.TABLE_CONSTRAINTS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = %s
+    """, (table, constraint))
+    return _count(cursor.fetchone()) > 0
+
+
+def _count(row):
+    return int(row['n'] if isinstance(row, dict) else row[0])
+
+
+def _backfill(cursor, set_sql, batch_size):
+    """Run an UPDATE over applications in id ranges so no single statement locks the whole table."""
+    cursor.execute("SELECT COALESCE(MIN(id), 0) AS lo, COALESCE(MAX(id), 0) AS hi FROM applications")
+    row = cursor.fetchone()
+    lo, hi = (row['lo'], row['hi']) if isinstance(row, dict) else row
+    updated = 0
+    for start in range(lo, hi + 1, batch_size):
+        cursor.execute(set_sql + " AND a.id BETWEEN %s AND %s", (start, start + batch_size - 1))
+        updated += max(cursor.rowcount, 0)
+    return updated
+
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) AS n FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return _count(cursor.fetchone()) > 0
+
+
+def index_covers(cursor, table, columns):
+    """True if some index on table starts with exactly these columns (in order)."""
+    cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table,))
+    indexes = {}
+    for row in cursor.fetchall():
+        name, column = (row['INDEX_NAME'], row['COLUMN_NAME']) if isinstance(row, dict) else row
+        indexes.setdefault(name, []).append(column.lower())
+    wanted = [c.lower() for c in columns]
+    return any(cols[:len(wanted)] == wanted for cols in indexes.values())
+
+
+# ----- 1: helper tables (formerly ensure_helper_tables() at import) -----
+def create_helper_tables(cursor):
+    # ✅ 1) Ensure companies table exists (required for FK)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS companies (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL
+        )
+    """)
+
+    # ✅ 2) company_shortlist table (depends on companies)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS company_shortlist (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            company_id INT NOT NULL,
+            round_number INT NOT NULL,
+            registration_number VARCHAR(50) NOT NULL,
+            student_name VARCHAR(255),
+            email VARCHAR(255),
+            branch VARCHAR(50),
+            year VARCHAR(20),
+            status ENUM('Passed','Failed') DEFAULT 'Passed',
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uniq_student_round (company_id, round_number, registration_number),
+            CONSTRAINT fk_company_shortlist_company
+                FOREIGN KEY (company_id) REFERENCES companies(id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        )
+    """)
+
+    # ✅ 3) uploaded_round_files table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS uploaded_round_files (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            company_id INT NOT NULL,
+            round_number INT NOT NULL,
+            file_name VARCHAR(255),
+            file_path VARCHAR(255),
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # ✅ 4) company_stats: per-company counters kept in step with applications
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS company_stats (
+            company_id INT PRIMARY KEY,
+            total_applications INT NOT NULL DEFAULT 0,
+            total_eligible INT NOT NULL DEFAULT 0,
+            total_applied INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            CONSTRAINT fk_company_stats_company
+                FOREIGN KEY (company_id) REFERENCES companies(id)
+                ON DELETE CASCADE
+        )
+    """)
+
+    # ✅ 5) upload_jobs: background import jobs (students / round results)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_jobs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            kind VARCHAR(50) NOT NULL,
+            status ENUM('queued','running','done','failed') DEFAULT 'queued',
+            file_name VARCHAR(255),
+            total_rows INT,
+            rows_parsed INT DEFAULT 0,
+            inserted INT DEFAULT 0,
+            failed INT DEFAULT 0,
+            message TEXT,
+            result MEDIUMTEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME NULL,
+            finished_at DATETIME NULL
+        )
+    """)
+
+    # ✅ 6) company_shortlist_staging: round uploads land here before the swap
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS company_shortlist_staging (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            load_id CHAR(32) NOT NULL,
+            company_id INT NOT NULL,
+            round_number INT NOT NULL,
+            registration_number VARCHAR(50) NOT NULL,
+            student_name VARCHAR(255),
+            email VARCHAR(255),
+            branch VARCHAR(50),
+            year VARCHAR(20),
+            status ENUM('Passed','Failed') DEFAULT 'Passed',
+            KEY idx_staging_load (load_id)
+        )
+    """)
+
+
+# ----- applications: integer company_id / student_id keys -----
+def migrate_application_keys(cursor, batch_size=5000):
+    """
+    Online migration: add applications.company_id / student_id, back-fill them from the
+    company_name / registration_number strings in id-range batches, then add indexes
+    and foreign keys. Safe to re-run; every step checks what already exists.
+    company_stats is re-keyed on company_id and rebuilt (it only holds derived counts).
+    """
+    for column in ("company_id", "student_id"):
+        if not column_exists(cursor, "applications", column):
+            logging.info(f"Adding applications.{column}")
+            cursor.execute(f"ALTER TABLE applications ADD COLUMN {column} INT NULL")
+
+    # lookup indexes used by the back-fill joins
+    if not index_exists(cursor, "companies", "idx_companies_name"):
+        cursor.execute("CREATE INDEX idx_companies_name ON companies (name)")
+    if not index_exists(cursor, "students", "idx_students_registration_number"):
+        cursor.execute("CREATE INDEX idx_students_registration_number ON students (registration_number)")
+
+    n = _backfill(cursor, """
+        UPDATE applications a
+        JOIN companies c ON c.name = a.company_name
+        SET a.company_id = c.id
+        WHERE a.company_id IS NULL
+    """, batch_size)
+    logging.info(f"Back-filled company_id on {n} applications")
+
+    n = _backfill(cursor, """
+        UPDATE applications a
+        JOIN students s ON s.registration_number = a.registration_number
+        SET a.student_id = s.id
+        WHERE a.student_id IS NULL
+    """, batch_size)
+    logging.info(f"Back-filled student_id on {n} applications")
+
+    # rows whose company / student was deleted before FKs existed can't satisfy the constraints
+    cursor.execute("""
+        DELETE a FROM applications a
+        LEFT JOIN companies c ON c.id = a.company_id
+        WHERE a.company_id IS NULL OR c.id IS NULL
+    """)
+    logging.info(f"Removed {cursor.rowcount} applications of deleted companies")
+    cursor.execute("""
+        DELETE a FROM applications a
+        LEFT JOIN students s ON s.id = a.student_id
+        WHERE a.student_id IS NULL OR s.id IS NULL
+    """)
+    logging.info(f"Removed {cursor.rowcount} applications of deleted students")
+
+    if not index_exists(cursor, "applications", "idx_applications_company_student"):
+        cursor.execute("CREATE INDEX idx_applications_company_student ON applications (company_id, student_id)")
+    if not index_exists(cursor, "applications", "idx_applications_student"):
+        cursor.execute("CREATE INDEX idx_applications_student ON applications (student_id)")
+
+    # With foreign_key_checks on, ADD FOREIGN KEY is a table-copying ALTER that blocks
+    # writes for the whole rebuild; off, InnoDB adds it in place. The orphan DELETEs
+    # above are what guarantee the existing rows satisfy both constraints.
+    cursor.execute("SET foreign_key_checks = 0")
+    try:
+        if not constraint_exists(cursor, "applications", "fk_applications_company"):
+            cursor.execute("""
+                ALTER TABLE applications
+                ADD CONSTRAINT fk_applications_company
+                    FOREIGN KEY (company_id) REFERENCES companies(id)
+                    ON DELETE CASCADE ON UPDATE CASCADE,
+                ALGORITHM=INPLACE, LOCK=NONE
+            """)
+        if not constraint_exists(cursor, "applications", "fk_applications_student"):
+            cursor.execute("""
+                ALTER TABLE applications
+                ADD CONSTRAINT fk_applications_student
+                    FOREIGN KEY (student_id) REFERENCES students(id)
+                    ON DELETE CASCADE ON UPDATE CASCADE,
+                ALGORITHM=INPLACE, LOCK=NONE
+            """)
+    finally:
+        cursor.execute("SET foreign_key_checks = 1")
+
+    # company_stats: derived data, re-key on company_id if needed and always recount
+    if not column_exists(cursor, "company_stats", "company_id"):
+        cursor.execute("DROP TABLE IF EXISTS company_stats")
+        cursor.execute("""
+            CREATE TABLE company_stats (
+                company_id INT PRIMARY KEY,
+                total_applications INT NOT NULL DEFAULT 0,
+                total_eligible INT NOT NULL DEFAULT 0,
+                total_applied INT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                CONSTRAINT fk_company_stats_company
+                    FOREIGN KEY (company_id) REFERENCES companies(id)
+                    ON DELETE CASCADE
+            )
+        """)
+    from utils import refresh_company_stats
+    refresh_company_stats(cursor)
+
+
+# ----- 3: indexes on the hot filters / joins -----
+# (table, index name, columns). check-indexes reports any entry not covered by an
+# existing index with the same leading columns.
+HOT_PATH_INDEXES = [
+    ("applications", "idx_applications_company_student", ("company_id", "student_id")),
+    ("applications", "idx_applications_student", ("student_id",)),
+    ("applications", "idx_applications_eligible_applied", ("eligible", "applied")),
+    ("students", "idx_students_registration_number", ("registration_number",)),
+    ("students", "idx_students_section_specialization", ("section", "specialization")),
+    ("students", "idx_students_email", ("email",)),
+    ("companies", "idx_companies_name", ("name",)),
+    ("companies", "idx_companies_drive_date", ("drive_date",)),
+    ("tutors", "idx_tutors_email", ("email",)),
+    ("student_auth", "idx_student_auth_email", ("email",)),
+    ("uploaded_round_files", "idx_round_files_company_round", ("company_id", "round_number")),
+]
+
+
+def create_hot_path_indexes(cursor, indexes=HOT_PATH_INDEXES):
+    for table, name, columns in indexes:
+        if not table_exists(cursor, table) or not all(column_exists(cursor, table, c) for c in columns):
+            logging.warning(f"Skipping {name}: {table}({', '.join(columns)}) does not exist")
+            continue
+        if index_covers(cursor, table, columns):
+            continue
+        logging.info(f"Creating {name} on {table}({', '.join(columns)})")
+        # InnoDB builds secondary indexes in place without blocking reads/writes
+        cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)}) ALGORITHM=INPLACE LOCK=NONE")
+
+
+def missing_indexes(cursor):
+    """Expected indexes not covered by the live schema, as (table, name, columns)."""
+    return [(table, name, columns) for table, name, columns in EXPECTED_INDEXES
+            if not index_covers(cursor, table, columns)]
+
+
+# ----- 5: keyset index for the section listings -----
+# Its own list: migration 3 has shipped, so HOT_PATH_INDEXES must not change under it.
+SECTION_LISTING_INDEXES = [
+    ("students", "idx_students_section_spec_name", ("section", "specialization", "name")),
+]
+
+
+def create_section_listing_index(cursor):
+    create_hot_path_indexes(cursor, SECTION_LISTING_INDEXES)
+
+
+# everything check-indexes expects to find
+EXPECTED_INDEXES = HOT_PATH_INDEXES + SECTION_LISTING_INDEXES
+
+
+# ----- 4: data_version stamp (bumped by mark_data_changed) -----
+def create_data_version(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            id TINYINT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("INSERT IGNORE INTO data_version (id, version) VALUES (1, 0)")
+
+
+# ----- 6: FULLTEXT search over companies -----
+def create_company_search_index(cursor):
+    columns = ("name", "job_type", "job_description")
+    if not all(column_exists(cursor, "companies", c) for c in columns):
+        logging.warning("Skipping ft_companies_search: companies is missing a search column")
+        return
+    if not index_exists(cursor, "companies", "ft_companies_search"):
+        logging.info("Creating FULLTEXT ft_companies_search on companies")
+        cursor.execute("ALTER TABLE companies ADD FULLTEXT INDEX ft_companies_search (name, job_type, job_description)")
+
+
+# ----- 7: company_rounds, back-filled from companies.selection_process -----
+def create_company_rounds(cursor, batch_size=500):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS company_rounds (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            company_id INT NOT NULL,
+            round_number INT NOT NULL,
+            round_name VARCHAR(255) NOT NULL,
+            UNIQUE KEY uniq_company_round (company_id, round_number),
+            CONSTRAINT fk_company_rounds_company
+                FOREIGN KEY (company_id) REFERENCES companies(id)
+                ON DELETE CASCADE
+        )
+    """)
+    if not column_exists(cursor, "companies", "selection_process"):
+        return
+
+    from utils import parse_selection_process
+    last_id, filled = 0, 0
+    while True:
+        cursor.execute("""
+            SELECT c.id, c.selection_process FROM companies c
+            WHERE c.id > %s
+              AND NOT EXISTS (SELECT 1 FROM company_rounds r WHERE r.company_id = c.id)
+            ORDER BY c.id LIMIT %s
+        """, (last_id, batch_size))
+        companies = cursor.fetchall()
+        if not companies:
+            break
+        rows = []
+        for row in companies:
+            company_id, selection_process = (row['id'], row['selection_process']) if isinstance(row, dict) else row
+            last_id = company_id
+            rows += [(company_id, i + 1, name[:255])
+                     for i, name in enumerate(parse_selection_process(selection_process))]
+        if rows:
+            cursor.executemany(
+                "INSERT IGNORE INTO company_rounds (company_id, round_number, round_name) VALUES (%s, %s, %s)",
+                rows
+            )
+            filled += len(rows)
+    logging.info(f"Back-filled {filled} company_rounds rows")
+
+
+# ----- 8: eligibility criteria as columns, back-filled from companies.eligibility JSON -----
+def add_eligibility_columns(cursor, batch_size=500):
+    if not column_exists(cursor, "companies", "min_cgpa"):
+        cursor.execute("ALTER TABLE companies ADD COLUMN min_cgpa DECIMAL(4,2) NULL")
+    if not column_exists(cursor, "companies", "max_backlogs"):
+        cursor.execute("ALTER TABLE companies ADD COLUMN max_backlogs INT NULL")
+    if not column_exists(cursor, "companies", "eligibility"):
+        return
+
+    from eligibility import parse_criteria
+    last_id, filled = 0, 0
+    while True:
+        cursor.execute("""
+            SELECT id, eligibility FROM companies
+            WHERE id > %s AND min_cgpa IS NULL AND eligibility IS NOT NULL
+            ORDER BY id LIMIT %s
+        """, (last_id, batch_size))
+        companies = cursor.fetchall()
+        if not companies:
+            break
+        rows = []
+        for row in companies:
+            company_id, eligibility = (row['id'], row['eligibility']) if isinstance(row, dict) else row
+            last_id = company_id
+            min_cgpa, max_backlogs = parse_criteria(eligibility)
+            if min_cgpa is not None:
+                rows.append((min_cgpa, max_backlogs, company_id))
+        if rows:
+            cursor.executemany("UPDATE companies SET min_cgpa=%s, max_backlogs=%s WHERE id=%s", rows)
+            filled += len(rows)
+    logging.info(f"Back-filled eligibility criteria for {filled} companies")
+
+
+# ----- 9: round_file_rows, the parsed rows of each uploaded round file -----
+def create_round_file_rows(cursor):
+    if not column_exists(cursor, "uploaded_round_files", "row_count"):
+        # NULL = not cached yet (files uploaded before this migration: flask cache-round-files)
+        cursor.execute("ALTER TABLE uploaded_round_files ADD COLUMN row_count INT NULL")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS round_file_rows (
+            file_id INT NOT NULL,
+            line_no INT NOT NULL,
+            registration_number VARCHAR(50) NOT NULL,
+            student_name VARCHAR(255),
+            email VARCHAR(255),
+            branch VARCHAR(50),
+            year VARCHAR(20),
+            status ENUM('Passed','Failed') DEFAULT 'Passed',
+            PRIMARY KEY (file_id, line_no),
+            KEY idx_round_file_rows_status (file_id, status, line_no),
+            CONSTRAINT fk_round_file_rows_file
+                FOREIGN KEY (file_id) REFERENCES uploaded_round_files(id)
+                ON DELETE CASCADE
+        )
+    """)
+
+
+# ----- 10: company_stats back-fill -----
+def backfill_company_stats(cursor):
+    """
+    company_stats starts empty on an existing database and the bump_company_stats
+    deltas need a correct starting count, so recount every company from applications.
+    """
+    from utils import refresh_company_stats
+    refresh_company_stats(cursor)
+    cursor.execute("SELECT COUNT(*) AS n FROM company_stats")
+    logging.info(f"Back-filled company_stats for {_count(cursor.fetchone())} companies")
+
+
+# ----- 11: one application per (company, student) -----
+def add_unique_application_key(cursor):
+    """
+    INSERT IGNORE ... SELECT (add_students_to_applications) relies on a unique key
+    over the integer keys back-filled by migration 2; idx_applications_company_student
+    is not unique. Drop duplicate pairs (keeping the oldest row), add
+    uniq_applications_company_student and drop the index it replaces.
+    """
+    if index_exists(cursor, "applications", "uniq_applications_company_student"):
+        return
+    cursor.execute("""
+        DELETE a FROM applications a
+        JOIN applications b
+          ON b.company_id = a.company_id AND b.student_id = a.student_id AND b.id < a.id
+    """)
+    removed = cursor.rowcount
+    logging.info(f"Removed {removed} duplicate applications")
+    if removed:
+        from utils import refresh_company_stats
+        refresh_company_stats(cursor)
+
+    cursor.execute("""
+        ALTER TABLE applications
+        ADD UNIQUE KEY uniq_applications_company_student (company_id, student_id),
+        ALGORITHM=INPLACE, LOCK=NONE
+    """)
+    # the unique key also serves fk_applications_company
+    if index_exists(cursor, "applications", "idx_applications_company_student"):
+        cursor.execute("ALTER TABLE applications DROP INDEX idx_applications_company_student, "
+                       "ALGORITHM=INPLACE, LOCK=NONE")
+
+
+# ----- 12: applications left without a student -----
+def drop_studentless_applications(cursor):
+    """
+    Databases that ran migration 2 before it removed them still hold applications
+    whose student was deleted (student_id stayed NULL, which the FK allows).
+    """
+    cursor.execute("DELETE FROM applications WHERE student_id IS NULL")
+    removed = cursor.rowcount
+    logging.info(f"Removed {removed} applications of deleted students")
+    if removed:
+        from utils import refresh_company_stats
+        refresh_company_stats(cursor)
+
+
+# ----- runner -----
+# Append new migrations here; never renumber or edit one that has shipped.
+MIGRATIONS = [
+    (1, "helper tables", create_helper_tables),
+    (2, "applications integer keys", migrate_application_keys),
+    (3, "hot-path indexes", create_hot_path_indexes),
+    (4, "data version stamp", create_data_version),
+    (5, "section listing keyset index", create_section_listing_index),
+    (6, "company search FULLTEXT index", create_company_search_index),
+    (7, "company_rounds table", create_company_rounds),
+    (8, "eligibility criteria columns", add_eligibility_columns),
+    (9, "round file row cache", create_round_file_rows),
+    (10, "company_stats back-fill", backfill_company_stats),
+    (11, "unique (company_id, student_id) on applications", add_unique_application_key),
+    (12, "applications without a student", drop_studentless_applications),
+]
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def pending_versions(cursor):
+    if not table_exists(cursor, "schema_migrations"):
+        return [version for version, _, _ in MIGRATIONS]
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {row['version'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+    return [version for version, _, _ in MIGRATIONS if version not in applied]
+
+
+def run_migrations():
+    """
+    Apply pending migrations in order and return their versions.
+    A MySQL named lock keeps two deploys (or release + web) from running them at once.
+    """
+    with db.cursor(dictionary=False) as (cursor, conn):
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for another migration run to finish")
+        try:
+            _ensure_version_table(cursor)
+            pending = set(pending_versions(cursor))
+            applied = []
+            for version, name, migrate in MIGRATIONS:
+                if version not in pending:
+                    continue
+                logging.info(f"Applying migration {version}: {name}")
+                migrate(cursor)
+                cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                               (version, name))
+                applied.append(version)
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchall()
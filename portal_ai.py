@@ -1,4 +1,9 @@
 import os
+import re
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.engine import URL
@@ -6,26 +11,48 @@ from sqlalchemy.engine import URL
 from langchain_community.utilities import SQLDatabase
 from langchain_community.agent_toolkits import create_sql_agent
 from langchain_groq import ChatGroq
+from langchain_core.callbacks import BaseCallbackHandler
+
+import ai_schema
+import db_connection
+import metrics
+from cache import TTLCache
+from utils import get_data_version
 
 
 # ✅ Load .env only for local development
 # On Railway, variables come from Railway Dashboard → Variables
 load_dotenv()
 
+# ✅ AI requests run on a small bounded pool, never on the web thread itself
+AI_WORKERS = int(os.getenv("AI_WORKERS", "2"))          # concurrent agent runs per process
+AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", "20"))     # waiting questions before we answer 503
+AI_DEADLINE = float(os.getenv("AI_DEADLINE", "45"))     # seconds from submit to answer, queue included
+
 
-def get_ai_agent():
-    """Creates and returns LangChain SQL Agent."""
+def get_llm():
     groq_api_key = os.getenv("GROQ_API_KEY")
     if not groq_api_key:
         raise ValueError("GROQ_API_KEY is missing. Add it in Railway Variables.")
 
     # ✅ Groq LLM
-    llm = ChatGroq(
+    return ChatGroq(
         model="llama-3.1-8b-instant",
         api_key=groq_api_key,
-        temperature=0.2
+        temperature=0.2,
+        timeout=AI_DEADLINE,
     )
 
+
+_ENGINE = None
+
+
+def get_engine():
+    """SQLAlchemy engine for the agent (created once per process)."""
+    global _ENGINE
+    if _ENGINE is not None:
+        return _ENGINE
+
     # ✅ DB Env Variables
     db_user = os.getenv("DB_USER")
     db_password = os.getenv("DB_PASSWORD")
@@ -55,36 +82,219 @@ def get_ai_agent():
         database=db_name,
     )
 
-    engine = create_engine(
+    # 📖 agent queries are read-only: point them at the replica when there is one
+    replica = db_connection.REPLICA_CONFIG
+    if replica is not None:
+        replica_url = URL.create(
+            drivername="mysql+pymysql",
+            username=replica["user"],
+            password=replica["password"],
+            host=replica["host"],
+            port=int(replica["port"]),
+            database=replica["database"],
+        )
+        engine = create_engine(replica_url, pool_pre_ping=True, pool_recycle=280)
+        try:
+            with engine.connect():
+                pass
+            _ENGINE = engine
+            return _ENGINE
+        except Exception as e:
+            print("⚠️ AI replica unavailable, using primary:", e)
+            engine.dispose()
+
+    _ENGINE = create_engine(
         url,
         pool_pre_ping=True,   # avoids stale connections
         pool_recycle=280,     # Railway-friendly
     )
+    return _ENGINE
 
-    db = SQLDatabase(engine)
+
+def get_ai_agent(tables=None):
+    """
+    Creates and returns LangChain SQL Agent limited to `tables` (default: the whole
+    allow-list). Table info comes from the precomputed ai_schema snapshot, so
+    SQLDatabase does no sample-row queries and describes only allow-listed columns.
+    """
+    engine = get_engine()
+    tables = list(tables or ai_schema.load_config())
+    snapshot = ai_schema.get_snapshot(engine)
+
+    db = SQLDatabase(
+        engine,
+        include_tables=tables,
+        sample_rows_in_table_info=0,
+        custom_table_info={t: snapshot[t] for t in tables if t in snapshot},
+        lazy_table_reflection=True,
+    )
 
     agent_executor = create_sql_agent(
-        llm=llm,
+        llm=get_llm(),
         db=db,
         verbose=True,
         handle_parsing_errors=True,
-        return_intermediate_steps=False
+        return_intermediate_steps=False,
+        max_execution_time=AI_DEADLINE,   # agent stops itself once the request deadline has passed
     )
 
 
     return agent_executor
 
 
-# ✅ Lazy-loaded global agent (Railway safe)
-_AGENT = None
+# ✅ Lazy-loaded agents, one per table selection (Railway safe)
+_AGENTS = {}
 
 
-def get_agent():
+def get_agent(tables=None):
     """Create agent only when required (prevents Railway crash at startup)."""
-    global _AGENT
-    if _AGENT is None:
-        _AGENT = get_ai_agent()
-    return _AGENT
+    key = tuple(tables or ())
+    if key not in _AGENTS:
+        _AGENTS[key] = get_ai_agent(tables)
+    return _AGENTS[key]
+
+
+# ✅ Answer cache: keyed on (normalized question, data_version), so any write that
+# calls mark_data_changed() makes older answers unreachable; TTL/LRU clean them up.
+ANSWER_CACHE = TTLCache(
+    ttl=float(os.getenv("AI_CACHE_TTL", "3600")),
+    maxsize=int(os.getenv("AI_CACHE_SIZE", "512")),
+)
+
+
+def normalize_question(question: str) -> str:
+    """'Which companies offer SDE roles??' and 'which  companies offer sde roles' share a key."""
+    text = re.sub(r"[^\w\s.+<>=-]", " ", question.lower())
+    return re.sub(r"\s+", " ", text).strip(" .")
+
+
+# =======================
+# ⚡ FAST PATH: common question shapes answered with fixed SQL, no LLM
+# =======================
+# Patterns run on normalize_question() output (lower case, no '?' etc.) and are anchored
+# at both ends: a question with anything the template doesn't read (another company, a
+# city, a second filter) must go to the agent, not get the generic answer (which is cached).
+_LEAD = (r"(?:(?:please\s+)?(?:show|list|give|tell|find|get)(?:\s+me)?\s+"
+         r"|(?:what|which|when)(?:\s+(?:are|is))?\s+)?(?:(?:all|the)\s+)*")
+_COMPANY = r"(?:for|to|in|at|by|of)\s+(?P<company>[\w&.+-]+(?:\s+[\w&.+-]+){0,3}?)(?:\s+compan(?:y|ies))?"
+_HOW_MANY = r"(?:how many|count(?:\s+of)?|number of|total)\s+(?:the\s+)?(?:students?\s+)?"
+_ROLE_WORDS = r"(?:roles?|jobs?|positions?|openings?|profiles?|job descriptions?|jd)"
+_OPS = {
+    "above": ">", "over": ">", "more than": ">", "greater than": ">", ">": ">",
+    "at least": ">=", ">=": ">=", "minimum": ">=", "min": ">=",
+    "below": "<", "under": "<", "less than": "<", "<": "<",
+    "at most": "<=", "<=": "<=", "maximum": "<=", "max": "<=",
+}
+_OP_PATTERN = "|".join(sorted((re.escape(k) for k in _OPS), key=len, reverse=True))
+
+
+def _format_rows(title, rows, fmt):
+    if not rows:
+        return f"{title}: none found."
+    return f"{title} ({len(rows)}):\n" + "\n".join("• " + fmt(r) for r in rows)
+
+
+def _company_line(r):
+    details = ", ".join(str(v) for v in (r.get("job_type"), r.get("package"),
+                                         r.get("location"), r.get("drive_date")) if v)
+    return f"{r['name']} ({details})" if details else r["name"]
+
+
+_COMPANY_COLUMNS = "name, job_type, package, location, drive_date"
+
+
+def _fast_upcoming(m, cursor):
+    cursor.execute(f"""
+        SELECT {_COMPANY_COLUMNS} FROM companies
+        WHERE drive_date >= CURDATE()
+        ORDER BY drive_date ASC
+        LIMIT 50
+    """)
+    return _format_rows("Upcoming drives", cursor.fetchall(), _company_line)
+
+
+def _fast_package(m, cursor):
+    op, amount = _OPS[m.group("op")], float(m.group("amount"))
+    # package is free text like "6 LPA"; the numeric prefix is what we compare
+    cursor.execute(f"""
+        SELECT {_COMPANY_COLUMNS} FROM companies
+        WHERE package REGEXP '^[[:space:]]*[0-9]'
+          AND CAST(package AS DECIMAL(10,2)) {op} %s
+        ORDER BY CAST(package AS DECIMAL(10,2)) DESC
+        LIMIT 50
+    """, (amount,))
+    return _format_rows(f"Companies with package {m.group('op')} {m.group('amount')} LPA",
+                        cursor.fetchall(), _company_line)
+
+
+def _fast_counts(column, label):
+    """'how many eligible/applied [for X]': read straight from company_stats."""
+    def handler(m, cursor):
+        company = (m.group("company") or "").strip()
+        where, params = "", ()
+        if company:
+            where, params = "WHERE c.name LIKE %s", (f"%{company}%",)
+        cursor.execute(f"""
+            SELECT c.name, COALESCE(cs.{column}, 0) AS n
+            FROM companies c
+            LEFT JOIN company_stats cs ON cs.company_id = c.id
+            {where}
+            ORDER BY n DESC, c.name
+            LIMIT 50
+        """, params)
+        rows = cursor.fetchall()
+        if company and not rows:
+            return None          # unknown company name: let the agent work it out
+        if company and len(rows) == 1:
+            return f"{rows[0]['n']} students {label} for {rows[0]['name']}."
+        return _format_rows(f"Students {label} per company", rows,
+                            lambda r: f"{r['name']}: {r['n']}")
+    return handler
+
+
+def _fast_role(m, cursor):
+    role = m.group("role").strip()
+    cursor.execute(f"""
+        SELECT {_COMPANY_COLUMNS} FROM companies
+        WHERE job_type LIKE %s OR job_description LIKE %s OR name LIKE %s
+        ORDER BY drive_date DESC
+        LIMIT 50
+    """, (f"%{role}%", f"%{role}%", f"%{role}%"))
+    return _format_rows(f"Companies for {role.upper() if len(role) <= 4 else role} roles",
+                        cursor.fetchall(), _company_line)
+
+
+# (compiled pattern, handler) — first match wins; handlers may return None to fall through
+FAST_PATH_INTENTS = [
+    (re.compile(rf"^{_LEAD}(?:upcoming|next|future|scheduled)\s+(?:(?:placement|campus|recruitment)\s+)?"
+                r"(?:drives?|compan(?:y|ies)|placements?|interviews?)(?:\s+(?:dates?|schedule))?$"
+                rf"|^{_LEAD}(?:upcoming\s+)?(?:placement\s+)?drive\s+dates?$"), _fast_upcoming),
+    (re.compile(rf"^{_LEAD}(?:compan(?:y|ies)\s+(?:with|offering|having|that\s+offers?|offers?)\s+(?:an?\s+)?)?"
+                rf"(?:package|ctc|salary)\s+(?:of\s+|is\s+)?(?P<op>{_OP_PATTERN})\s*(?P<amount>\d+(?:\.\d+)?)"
+                r"(?:\s*(?:lpa|lakhs?))?$"), _fast_package),
+    (re.compile(rf"^{_HOW_MANY}(?:are\s+)?eligible(?:\s+students?)?(?:\s+(?:are\s+there|there\s+are))?"
+                rf"(?:\s+{_COMPANY})?$"),
+     _fast_counts("total_eligible", "eligible")),
+    (re.compile(rf"^{_HOW_MANY}(?:(?:have|has)\s+)?(?:applied|applications?)(?:\s+(?:are\s+there|there\s+are))?"
+                rf"(?:\s+{_COMPANY})?$"),
+     _fast_counts("total_applied", "applied")),
+    (re.compile(rf"^{_LEAD}compan(?:y|ies)\s+(?:offer|offers|offering|with|for|hiring|have|having|has)\s+"
+                rf"(?:an?\s+)?(?P<role>[a-z][\w.+-]*(?:\s+[a-z][\w.+-]*){{0,2}}?)\s+{_ROLE_WORDS}$"), _fast_role),
+]
+
+
+def fast_answer(question):
+    """Answer from FAST_PATH_INTENTS, or None when no template fits."""
+    q = normalize_question(question)
+    for pattern, handler in FAST_PATH_INTENTS:
+        m = pattern.match(q)
+        if not m:
+            continue
+        with db_connection.read_cursor() as (cursor, conn):
+            answer = handler(m, cursor)
+        if answer is not None:
+            return answer
+    return None
 
 
 # =======================
@@ -93,22 +303,185 @@ def get_agent():
 class AI:
     def __init__(self, question: str):
         self.question = question
+        self.key = normalize_question(question)
+
+    def cached(self):
+        """Cached answer for this question at the current data version, or None."""
+        version = get_data_version()
+        return ANSWER_CACHE.get((self.key, version)) if version is not None else None
 
-    def ask(self) -> str:
-        prompt = f"""
+    def ask(self, callbacks=None) -> str:
+        version = get_data_version()
+        if version is not None:
+            cached = ANSWER_CACHE.get((self.key, version))
+            if cached is not None:
+                return cached
+
+        answer = self.fast_answer()
+        if answer is None:
+            answer = self._ask_agent(callbacks)
+        if version is not None and not answer.startswith("AI Error"):
+            ANSWER_CACHE.set((self.key, version), answer)
+        return answer
+
+    def fast_answer(self):
+        try:
+            return fast_answer(self.question)
+        except Exception as e:
+            print("AI fast path error:", e)
+            return None
+
+    def _ask_agent(self, callbacks=None) -> str:
+        started, outcome = time.monotonic(), "error"
+        try:
+            # only the tables this question needs go into the prompt and the agent
+            tables = ai_schema.select_tables(self.question)
+            schema = ai_schema.schema_context(get_engine(), tables)
+            prompt = f"""
 You are an AI assistant for a Training & Placement portal.
 Answer user questions using the MySQL database.
+The relevant tables are described below; you do not need to list tables or fetch their schema.
 Do NOT show SQL queries in the final answer.
 
+{schema}
+
 Question: {self.question}
 """
-
-        try:
-            agent = get_agent()
-            result = agent.invoke({"input": prompt})
+            agent = get_agent(tables)
+            result = agent.invoke({"input": prompt}, config={"callbacks": callbacks or []})
+            outcome = "ok"
             return result.get("output", "No output returned.")
         except Exception as e:
             return f"AI Error: {str(e)}"
+        finally:
+            metrics.AI_AGENT_SECONDS.observe(time.monotonic() - started, outcome=outcome)
+
+
+# =======================
+# ✅ BOUNDED AI EXECUTOR
+# =======================
+class AIQueueFull(Exception):
+    pass
+
+
+TOOL_MESSAGES = {
+    "sql_db_list_tables": "Looking up tables",
+    "sql_db_schema": "Reading table definitions",
+    "sql_db_query_checker": "Checking the query",
+    "sql_db_query": "Querying the database",
+}
+
+
+class _ProgressHandler(BaseCallbackHandler):
+    """Turns agent tool calls into progress messages for the streaming endpoint."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def on_agent_action(self, action, **kwargs):
+        self.events.put(TOOL_MESSAGES.get(action.tool, "Thinking"))
+
+
+class AskTicket:
+    """One submitted question: its future, progress messages and queue position."""
+
+    def __init__(self, question):
+        self.question = question
+        self.events = queue.Queue()
+        self.submitted_at = time.monotonic()
+        self.future = None
+
+    def position(self):
+        """1-based place among waiting questions in this process; 0 once running."""
+        with _QUEUE_LOCK:
+            return _WAITING.index(self) + 1 if self in _WAITING else 0
+
+    def remaining(self):
+        return AI_DEADLINE - (time.monotonic() - self.submitted_at)
+
+    def cancel(self):
+        with _QUEUE_LOCK:
+            if self in _WAITING:
+                _WAITING.remove(self)
+        self.future.cancel()     # no-op once running; the agent's own deadline ends it
+
+
+_EXECUTOR = None
+_EXECUTOR_PID = None
+_WAITING = []
+_QUEUE_LOCK = threading.Lock()
+
+
+def _executor():
+    """Thread pool for this process (re-created after fork, like jobs._executor)."""
+    global _EXECUTOR, _EXECUTOR_PID
+    with _QUEUE_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_PID != os.getpid():
+            _EXECUTOR = ThreadPoolExecutor(max_workers=AI_WORKERS, thread_name_prefix="ai")
+            _EXECUTOR_PID = os.getpid()
+            _WAITING.clear()
+        return _EXECUTOR
+
+
+def _run(ticket):
+    with _QUEUE_LOCK:
+        if ticket in _WAITING:
+            _WAITING.remove(ticket)
+    ticket.events.put("Working on your question")
+    outcome = "error"
+    try:
+        answer = AI(ticket.question).ask(callbacks=[_ProgressHandler(ticket.events)])
+        outcome = "error" if answer.startswith("AI Error") else "ok"
+        return answer
+    finally:
+        metrics.AI_SECONDS.observe(time.monotonic() - ticket.submitted_at, outcome=outcome)
+
+
+def submit_question(question):
+    """Queue a question on the AI pool; raises AIQueueFull when too many are waiting."""
+    executor = _executor()
+    ticket = AskTicket(question)
+    with _QUEUE_LOCK:
+        if len(_WAITING) >= AI_MAX_QUEUE:
+            raise AIQueueFull()
+        _WAITING.append(ticket)
+    ticket.future = executor.submit(_run, ticket)
+    return ticket
+
+
+def ticket_events(ticket, poll=1.0):
+    """
+    Yield (event, data) pairs until the answer is ready or the deadline passes:
+    'queued' {position}, 'progress' {message}, 'running' {elapsed} heartbeats,
+    then 'answer' {answer} or 'error' {error}.
+    """
+    last_position = None
+    while True:
+        position = ticket.position()
+        if position and position != last_position:
+            yield "queued", {"position": position}
+        last_position = position
+
+        remaining = ticket.remaining()
+        if remaining <= 0:
+            ticket.cancel()
+            yield "error", {"error": f"No answer within {AI_DEADLINE:.0f}s, please try again."}
+            return
+        try:
+            yield "progress", {"message": ticket.events.get(timeout=min(poll, remaining))}
+            continue
+        except queue.Empty:
+            pass
+        if ticket.future.done():
+            break
+        if not position:
+            yield "running", {"elapsed": round(time.monotonic() - ticket.submitted_at, 1)}
+
+    answer = ticket.future.result()
+    if answer.startswith("AI Error"):
+        yield "error", {"error": answer}
+    else:
+        yield "answer", {"answer": answer}
 
 
 # ✅ Local testing
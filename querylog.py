@@ -0,0 +1,151 @@
+# querylog.py
+import os
+import re
+import logging
+import threading
+from contextlib import contextmanager
+
+import metrics
+
+# ✅ Query tracking on top of db_connection's query hooks:
+#   - statements slower than SLOW_QUERY_MS are logged with the route / job running them
+#   - a request or job that runs more than QUERY_BUDGET statements, or the same statement
+#     shape N_PLUS_ONE_THRESHOLD times, is flagged (the classic N+1 loop)
+# QUERY_TRACKING=log (default) only logs; strict raises QueryPolicyError when the request
+# or job finishes, so tests / local runs fail loudly; off disables the per-request checks.
+MODE = os.getenv("QUERY_TRACKING", "log").lower()
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "25"))
+
+SLOW_QUERIES = metrics.Counter("tnp_db_slow_queries_total", "Statements over SLOW_QUERY_MS by label.")
+QUERY_FLAGS = metrics.Counter("tnp_query_flags_total",
+                              "Requests / jobs over the query budget or with repeated statements.")
+
+
+class QueryPolicyError(RuntimeError):
+    """Raised in strict mode when a request or job breaks the query budget or repeats a statement."""
+
+
+def configure(mode=None, slow_query_ms=None, query_budget=None, n_plus_one=None):
+    """Override the env settings (e.g. configure(mode="strict") in a test setup)."""
+    global MODE, SLOW_QUERY_MS, QUERY_BUDGET, N_PLUS_ONE_THRESHOLD
+    if mode is not None:
+        MODE = mode
+    if slow_query_ms is not None:
+        SLOW_QUERY_MS = slow_query_ms
+    if query_budget is not None:
+        QUERY_BUDGET = query_budget
+    if n_plus_one is not None:
+        N_PLUS_ONE_THRESHOLD = n_plus_one
+
+
+_LITERALS = [
+    (re.compile(r"'(?:[^'\\]|\\.)*'"), "?"),                  # string literals
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),                  # numbers
+    (re.compile(r"%\(\w+\)s|%s"), "?"),                       # driver placeholders
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?+)"),      # IN lists / VALUES rows of any length
+    (re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+"), "(?+)"),    # multi-row VALUES
+    (re.compile(r"\s+"), " "),
+]
+
+
+def statement_shape(statement):
+    """Statement with literals and placeholders folded, so one loop's queries share a shape."""
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode(errors="replace")
+    shape = statement or ""
+    for pattern, repl in _LITERALS:
+        shape = pattern.sub(repl, shape)
+    return shape.strip()
+
+
+# ----- per-request / per-job tracking -----
+_local = threading.local()
+
+
+def start(label, strict=True):
+    _local.scope = {"label": label, "queries": 0, "shapes": {}, "flagged": set(), "strict": strict}
+
+
+def current_scope():
+    return getattr(_local, "scope", None)
+
+
+def _flag(scope, kind, message):
+    if kind in scope["flagged"]:
+        return
+    scope["flagged"].add(kind)
+    QUERY_FLAGS.inc(label=scope["label"], kind=kind.split(":")[0])
+    logging.warning(f"⚠️ {message}")
+
+
+def record_query(statement, seconds, rows):
+    """db_connection query hook."""
+    scope = current_scope()
+    label = scope["label"] if scope else "background"
+    ms = seconds * 1000
+
+    shape = None
+    if ms >= SLOW_QUERY_MS:
+        shape = statement_shape(statement)
+        SLOW_QUERIES.inc(label=label)
+        logging.warning(f"🐢 Slow query ({ms:.0f} ms, {rows} rows) in {label}: {shape[:500]}")
+
+    if scope is None or MODE == "off":
+        return
+    scope["queries"] += 1
+    shape = shape or statement_shape(statement)
+    count = scope["shapes"][shape] = scope["shapes"].get(shape, 0) + 1
+
+    if count == N_PLUS_ONE_THRESHOLD:
+        _flag(scope, f"repeated:{shape}",
+              f"N+1 suspected in {label}: same statement run {count}+ times: {shape[:300]}")
+    if scope["queries"] == QUERY_BUDGET + 1:
+        _flag(scope, "budget", f"{label} ran more than {QUERY_BUDGET} statements")
+
+
+def finish():
+    """
+    End the scope on this thread. Returns a summary; in strict mode raises
+    QueryPolicyError if the scope was flagged.
+    """
+    scope = current_scope()
+    _local.scope = None
+    if scope is None:
+        return None
+    summary = {
+        "label": scope["label"],
+        "queries": scope["queries"],
+        "repeated": {s: n for s, n in scope["shapes"].items() if n >= N_PLUS_ONE_THRESHOLD},
+        "over_budget": scope["queries"] > QUERY_BUDGET,
+    }
+    if MODE == "strict" and scope["strict"] and scope["flagged"]:
+        problems = [f"{summary['queries']} statements (budget {QUERY_BUDGET})"] if summary["over_budget"] else []
+        problems += [f"{n}x {s[:200]}" for s, n in summary["repeated"].items()]
+        raise QueryPolicyError(f"{scope['label']}: " + "; ".join(problems))
+    return summary
+
+
+def discard():
+    """Drop this thread's scope without checking it (the request already failed)."""
+    _local.scope = None
+
+
+@contextmanager
+def track(label, strict=True):
+    """
+    Track the statements run inside the block (background jobs, tests):
+
+        with querylog.track("students-import"):
+            ...
+
+    strict=False only logs, even in strict mode.
+    """
+    start(label, strict)
+    try:
+        yield
+    except BaseException:
+        discard()
+        raise
+    finish()
@@ -1,157 +1,755 @@
 # utils.py
 import os
+import re
+import json
+import time
+import uuid
+import base64
 import pandas as pd
-import numpy as np
 import logging
-from db_connection import get_cursor
+import db_connection as db
+from cache import TTLCache
+from eligibility import ELIGIBLE_SQL
+from flask import has_request_context, session
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
 
-def _to_py(x):
-    """Convert pandas/numpy types to native Python types."""
-    if pd.isna(x):
+# ----- READS (replica when safe) -----
+def read_cursor(dictionary=True):
+    """
+    db.read_cursor() for read-only pages. A session that wrote within the last
+    DB_REPLICA_STICKY_SECONDS reads from the primary so it sees its own change.
+    """
+    fresh_since = session.get('wrote_at') if has_request_context() else None
+    return db.read_cursor(dictionary=dictionary, fresh_since=fresh_since)
+
+
+# ----- LOGGED-IN PROFILES (tutors / students by email) -----
+# Per-worker LRU; add_tutor / student edits call invalidate_profile(). Other workers
+# catch up within PROFILE_CACHE_TTL seconds.
+PROFILE_CACHE = TTLCache(
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", "60")),
+    maxsize=int(os.getenv("PROFILE_CACHE_SIZE", "1024")),
+)
+PROFILE_TABLES = {"tutor": "tutors", "student": "students"}
+
+
+def get_profile(kind, email):
+    """The tutors / students row for email (None if there is none), cached."""
+    if not email:
+        return None
+
+    def load():
+        with read_cursor() as (cursor, conn):
+            cursor.execute(f"SELECT * FROM {PROFILE_TABLES[kind]} WHERE email=%s", (email,))
+            return cursor.fetchone()
+
+    return PROFILE_CACHE.get_or_set((kind, email.strip().lower()), load)
+
+
+def invalidate_profile(kind=None, email=None):
+    """Forget one cached profile, or every cached profile when no email is given."""
+    if kind and email:
+        PROFILE_CACHE.pop((kind, email.strip().lower()))
+    else:
+        PROFILE_CACHE.clear()
+
+
+# ----- KEYSET PAGINATION -----
+def encode_cursor(values):
+    """Opaque, URL-safe page token for the sort key of a row (e.g. [name, id])."""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, arity):
+    """
+    Inverse of encode_cursor() for a sort key of `arity` values. None for a missing
+    or malformed token (wrong length, non-scalar items), so callers fall back to the
+    first page instead of failing on a hand-edited URL.
+    """
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except ValueError:
         return None
-    if isinstance(x, np.generic):
-        return x.item()
-    return x
+    if not isinstance(values, list) or len(values) != arity:
+        return None
+    if not all(isinstance(v, (str, int, float)) and not isinstance(v, bool) for v in values):
+        return None
+    return values
+
+
+def page_size(value, default=50, maximum=200):
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
 
 
-def add_students_to_applications(student_list):
+# ----- COMPANY SEARCH (FULLTEXT on name / job_type / job_description) -----
+FT_MIN_TOKEN = 3        # innodb_ft_min_token_size default
+FT_STOPWORDS = {
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from",
+    "how", "i", "in", "is", "it", "la", "of", "on", "or", "that", "the", "this", "to",
+    "was", "what", "when", "where", "who", "will", "with", "und", "www",
+}
+COMPANY_SEARCH_COLUMNS = "name, job_type, job_description"
+
+
+def _search_tokens(term):
+    return [t for t in re.split(r"[^\w]+", term.lower()) if t]
+
+
+def search_companies(term, page=1, per_page=20):
+    """
+    Ranked company search. Words of FT_MIN_TOKEN+ characters go through the
+    FULLTEXT index (every word required, prefix matches allowed); shorter words
+    such as "SE" are matched as whole words with REGEXP. Returns (rows, total).
+    """
+    tokens = _search_tokens(term)
+    long_words = [t for t in tokens if len(t) >= FT_MIN_TOKEN and t not in FT_STOPWORDS]
+    short_words = [t for t in tokens if len(t) < FT_MIN_TOKEN]
+
+    where, where_params = [], []
+    score, score_params = "0", []
+    if long_words:
+        boolean_query = " ".join(f"+{w}*" for w in long_words)
+        where.append(f"MATCH({COMPANY_SEARCH_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)")
+        where_params.append(boolean_query)
+        score = f"MATCH({COMPANY_SEARCH_COLUMNS}) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        score_params.append(" ".join(long_words))
+    for w in short_words:
+        pattern = f"(^|[^[:alnum:]]){w}([^[:alnum:]]|$)"
+        where.append("(name REGEXP %s OR job_type REGEXP %s OR job_description REGEXP %s)")
+        where_params += [pattern, pattern, pattern]
+    if not where:
+        where.append("1=1")
+
+    page = max(1, page)
+    where_sql = " AND ".join(where)
+    with read_cursor() as (cursor, conn):
+        try:
+            cursor.execute(f"SELECT COUNT(*) AS n FROM companies WHERE {where_sql}", where_params)
+        except db.Error as e:
+            if getattr(e, "errno", None) != 1191:      # no FULLTEXT index yet (migration pending)
+                raise
+            return _search_companies_like(cursor, tokens, page, per_page)
+        total = int(cursor.fetchone()['n'])
+        cursor.execute(f"""
+            SELECT *, {score} AS score
+            FROM companies
+            WHERE {where_sql}
+            ORDER BY score DESC, drive_date DESC, id DESC
+            LIMIT %s OFFSET %s
+        """, (*score_params, *where_params, per_page, (page - 1) * per_page))
+        return cursor.fetchall(), total
+
+
+def _search_companies_like(cursor, tokens, page, per_page):
+    """Unindexed fallback used only until the FULLTEXT migration has run."""
+    where = " AND ".join(["CONCAT_WS(' ', name, job_type, job_description) LIKE %s"] * len(tokens)) or "1=1"
+    params = [f"%{t}%" for t in tokens]
+    cursor.execute(f"SELECT COUNT(*) AS n FROM companies WHERE {where}", params)
+    total = int(cursor.fetchone()['n'])
+    cursor.execute(f"""
+        SELECT * FROM companies WHERE {where}
+        ORDER BY drive_date DESC, id DESC
+        LIMIT %s OFFSET %s
+    """, (*params, per_page, (page - 1) * per_page))
+    return cursor.fetchall(), total
+
+
+# ----- DASHBOARD STATS (shared by home() and admin_dashboard()) -----
+STATS_CACHE = TTLCache(ttl=float(os.getenv("STATS_CACHE_TTL", "30")), maxsize=8)
+
+
+def _load_dashboard_stats():
+    with read_cursor() as (cursor, conn):
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM students) AS total_students,
+                (SELECT COUNT(*) FROM companies) AS total_companies,
+                COUNT(*) AS total_applications,
+                COALESCE(SUM(eligible='Yes'), 0) AS total_eligible,
+                COALESCE(SUM(eligible='No'), 0) AS total_not_eligible,
+                COALESCE(SUM(applied='Yes'), 0) AS total_applied,
+                COALESCE(SUM(applied='No'), 0) AS total_not_applied
+            FROM applications
+        """)
+        row = cursor.fetchone() or {}
+    return {k: int(v or 0) for k, v in row.items()}
+
+
+def get_dashboard_stats():
+    """
+    Portal-wide counts for the landing page and admin dashboard, in one query.
+    Cached for STATS_CACHE_TTL seconds; write paths call mark_data_changed().
+    """
+    return STATS_CACHE.get_or_set("dashboard", _load_dashboard_stats)
+
+
+def mark_data_changed():
+    """Call after writes to students / companies / applications."""
+    STATS_CACHE.clear()
+    bump_data_version()
+    if has_request_context():
+        session['wrote_at'] = time.time()     # read-your-writes: see read_cursor()
+
+
+# ----- DATA VERSION (shared across workers; keys the AI answer cache) -----
+def get_data_version():
+    """Current data_version stamp, or None if it can't be read (callers then skip caching)."""
+    try:
+        with db.cursor(dictionary=False) as (cursor, conn):
+            cursor.execute("SELECT version FROM data_version WHERE id = 1")
+            row = cursor.fetchone()
+        return row[0] if row else None
+    except Exception as e:
+        logging.warning(f"Could not read data_version: {e}")
+        return None
+
+
+def bump_data_version():
+    try:
+        with db.cursor(dictionary=False) as (cursor, conn):
+            cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+    except Exception as e:
+        logging.warning(f"Could not bump data_version: {e}")
+
+
+def add_students_to_applications(registration_numbers, cursor=None, batch_size=1000, conn=None):
     """
     After adding students, populate their entries in all existing company applications.
-    student_list: list of dicts with student info
+    registration_numbers: registration numbers of the newly added students
+
+    Each batch is one INSERT ... SELECT joining those students with `companies`,
+    with the eligibility flag computed in SQL (the company's criteria when set). Runs on the caller's cursor when
+    one is given; pass its conn too so each batch runs in its own transaction when the
+    caller has none open. Returns the number of application rows created.
+    """
+    reg_nos = [r for r in dict.fromkeys(registration_numbers) if r is not None]
+    if not reg_nos:
+        return 0
+
+    if cursor is None:
+        with db.cursor(dictionary=False) as (cursor, conn):
+            return add_students_to_applications(reg_nos, cursor, batch_size, conn)
+
+    created = 0
+    for i in range(0, len(reg_nos), batch_size):
+        batch = reg_nos[i:i + batch_size]
+        # the (student, company) pairs this batch creates: the same set for both statements
+        new_pairs = f"""
+            FROM students s
+            CROSS JOIN companies c
+            WHERE s.registration_number IN ({", ".join(["%s"] * len(batch))})
+              AND NOT EXISTS (SELECT 1 FROM applications a
+                              WHERE a.company_id = c.id AND a.student_id = s.id)
+        """
+        eligible = f"""
+            CASE WHEN c.min_cgpa IS NOT NULL THEN {ELIGIBLE_SQL}
+                 WHEN COALESCE(s.cgpa, 0) >= 7 AND COALESCE(s.backlogs, 0) = 0
+                 THEN 'Yes' ELSE 'No' END
+        """
+        own_transaction = conn is not None and not conn.in_transaction
+        if own_transaction:
+            conn.start_transaction()
+
+        # 📊 count the pairs first: the INSERT ... SELECT is a locking read (gap locks on
+        # uniq_applications_company_student), so no other writer can add these pairs
+        # before the insert below and get them counted twice
+        cursor.execute(f"""
+            INSERT INTO company_stats (company_id, total_applications, total_eligible, total_applied)
+            SELECT c.id, COUNT(*), SUM({eligible} = 'Yes'), 0
+            {new_pairs}
+            GROUP BY c.id
+            ON DUPLICATE KEY UPDATE
+                total_applications = total_applications + VALUES(total_applications),
+                total_eligible = total_eligible + VALUES(total_eligible)
+        """, batch)
+        cursor.execute(f"""
+            INSERT IGNORE INTO applications
+            (student_id, company_id, registration_number, student_name, cgpa, backlogs,
+             section, specialization, company_name, eligible, applied)
+            SELECT s.id, c.id, s.registration_number, s.name, COALESCE(s.cgpa, 0), COALESCE(s.backlogs, 0),
+                   s.section, s.specialization, c.name, {eligible}, 'No'
+            {new_pairs}
+        """, batch)
+        created += max(cursor.rowcount, 0)
+
+        if own_transaction:
+            conn.commit()
+    logging.info(f"Applications created: {created}")
+    return created
+
+
+def add_company_to_applications(cursor, company_id, company_name):
+    """
+    Create one applications row per student for a newly added company.
+    Runs as a single INSERT ... SELECT on the caller's cursor, so it joins the
+    caller's transaction. Returns the number of application rows created.
+    """
+    cursor.execute("""
+        INSERT INTO applications
+        (student_id, company_id, registration_number, student_name, cgpa, backlogs,
+         company_name, section, specialization, eligible, applied)
+        SELECT id, %s, registration_number, name, cgpa, backlogs,
+               %s, section, specialization, 'No', 'No'
+        FROM students
+    """, (company_id, company_name))
+    created = cursor.rowcount
+    bump_company_stats(cursor, company_id, total=created)
+    return created
+
+
+# ----- SELECTION ROUNDS (company_rounds) -----
+def parse_selection_process(value):
+    """Round names from a selection_process value: a JSON list, or comma-separated text."""
+    if isinstance(value, (list, tuple)):
+        names = value
+    elif not value:
+        names = []
+    else:
+        text = str(value).strip()
+        names = None
+        if text.startswith('['):
+            try:
+                parsed = json.loads(text)
+                names = parsed if isinstance(parsed, list) else [text]
+            except ValueError:
+                pass
+        if names is None:
+            names = text.split(',')
+    return [str(n).strip() for n in names if str(n).strip()]
+
+
+def save_company_rounds(cursor, company_id, rounds):
+    """Replace a company's rows in company_rounds; rounds is a list of names (or raw selection_process)."""
+    names = parse_selection_process(rounds)
+    cursor.execute("DELETE FROM company_rounds WHERE company_id=%s", (company_id,))
+    if names:
+        cursor.executemany(
+            "INSERT INTO company_rounds (company_id, round_number, round_name) VALUES (%s, %s, %s)",
+            [(company_id, i + 1, name[:255]) for i, name in enumerate(names)]
+        )
+    return names
+
+
+def group_rounds(rows, key='id'):
+    """
+    Fold rows of `companies LEFT JOIN company_rounds` (ordered by company, round_number)
+    into one dict per company with a `rounds` list of {'round_number', 'round_name'}.
+    """
+    companies = {}
+    for row in rows:
+        number, name = row.pop('round_number', None), row.pop('round_name', None)
+        company = companies.setdefault(row[key], dict(row, rounds=[]))
+        if number is not None:
+            company['rounds'].append({'round_number': number, 'round_name': name})
+    return list(companies.values())
+
+
+# ----- PER-COMPANY STATS (company_stats summary table) -----
+def bump_company_stats(cursor, company_id, total=0, eligible=0, applied=0):
+    """Apply a delta to one company's counters (creating the row if needed)."""
+    if not (total or eligible or applied):
+        return
+    cursor.execute("""
+        INSERT INTO company_stats (company_id, total_applications, total_eligible, total_applied)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            total_applications = total_applications + VALUES(total_applications),
+            total_eligible = total_eligible + VALUES(total_eligible),
+            total_applied = total_applied + VALUES(total_applied)
+    """, (company_id, total, eligible, applied))
+
+
+def refresh_company_stats(cursor, company_id=None):
+    """
+    Recompute counters from `applications` for one company, or for all companies
+    when company_id is None (the reconcile / rebuild path).
     """
-    cursor, conn = get_cursor()
+    if company_id is None:
+        cursor.execute("DELETE FROM company_stats")
+        where, params = "WHERE company_id IS NOT NULL", ()
+    else:
+        cursor.execute("DELETE FROM company_stats WHERE company_id=%s", (company_id,))
+        where, params = "WHERE company_id=%s", (company_id,)
+
+    cursor.execute(f"""
+        INSERT INTO company_stats (company_id, total_applications, total_eligible, total_applied)
+        SELECT company_id, COUNT(*), SUM(eligible='Yes'), SUM(applied='Yes')
+        FROM applications
+        {where}
+        GROUP BY company_id
+    """, params)
+
+
+def get_company_stats(company_name):
+    """Dashboard counters for one company: a primary-key lookup on company_stats."""
+    with read_cursor() as (cursor, conn):
+        cursor.execute("""
+            SELECT cs.total_applications, cs.total_eligible, cs.total_applied
+            FROM companies c
+            JOIN company_stats cs ON cs.company_id = c.id
+            WHERE c.name=%s
+        """, (company_name,))
+        row = cursor.fetchone() or {}
+
+    total = int(row.get('total_applications') or 0)
+    eligible = int(row.get('total_eligible') or 0)
+    applied = int(row.get('total_applied') or 0)
+    return {
+        'company_name': company_name,
+        'total_applications': total,
+        'total_eligible': eligible,
+        'total_not_eligible': total - eligible,
+        'total_applied': applied,
+        'total_not_applied': total - applied
+    }
+
+
+# ----- ALL REQUIRED DB COLUMNS -----
+STUDENT_HEADERS = [
+    'registration_number', 'name', 'email', 'phone', 'course', 'section',
+    'specialization', 'semester', 'backlogs', 'status', 'cgpa', 'roll_no',
+    'department', 'marks_10th', 'marks_12th', 'current_stage'
+]
+
+# SQL Insert Query (executemany turns this into multi-row INSERTs)
+STUDENT_INSERT_SQL = """
+    INSERT IGNORE INTO students (
+        registration_number, name, email, phone, course, section, specialization,
+        semester, backlogs, status, cgpa, roll_no, department,
+        marks_10th, marks_12th, current_stage
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _iter_excel_chunks(file_path, chunk_size):
+    """Yield DataFrames of at most chunk_size rows from an .xlsx without loading the whole sheet."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
     try:
-        cursor.execute("SELECT name FROM companies")
-        companies = cursor.fetchall()
-        if not companies:
-            logging.info("No companies found, skipping applications update.")
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
             return
 
-        for student in student_list:
-            cgpa = student.get('cgpa') or 0
-            backlogs = student.get('backlogs') or 0
-            eligible = "Yes" if cgpa >= 7 and backlogs == 0 else "No"
-
-            for company in companies:
-                company_name = company['name']
-                cursor.execute("""
-                    INSERT IGNORE INTO applications
-                    (registration_number, student_name, cgpa, backlogs, section, specialization, company_name, eligible, applied)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    student.get('registration_number'),
-                    student.get('name'),
-                    cgpa,
-                    backlogs,
-                    student.get('section'),
-                    student.get('specialization'),
-                    company_name,
-                    eligible,
-                    "No"
-                ))
-        conn.commit()
-    except Exception as e:
-        logging.error(f"Failed to add students to applications: {e}")
+        start, buf = 0, []
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= chunk_size:
+                yield pd.DataFrame(buf, columns=header, index=range(start, start + len(buf)))
+                start, buf = start + len(buf), []
+        if buf:
+            yield pd.DataFrame(buf, columns=header, index=range(start, start + len(buf)))
     finally:
-        cursor.close()
-        conn.close()
+        wb.close()
 
 
-def bulk_add_students(file_path, batch_size=200):
+def iter_student_chunks(file_path, chunk_size=5000):
     """
-    Bulk add students from Excel or CSV file.
-    Returns dictionary: {'inserted': int, 'failed': int, 'errors': list}
+    Stream a CSV/Excel student file as DataFrames of at most chunk_size rows,
+    already cleaned to STUDENT_HEADERS with native Python values (None for blanks).
     """
-
-    # ----- READ FILE -----
     ext = file_path.rsplit('.', 1)[-1].lower()
     if ext == 'csv':
-        df = pd.read_csv(file_path)
-    elif ext in ['xls', 'xlsx']:
-        df = pd.read_excel(file_path, engine='openpyxl')
+        chunks = pd.read_csv(file_path, chunksize=chunk_size)
+    elif ext == 'xlsx':
+        chunks = _iter_excel_chunks(file_path, chunk_size)
+    elif ext == 'xls':
+        # legacy .xls has no streaming reader, slice it after loading
+        df = pd.read_excel(file_path)
+        chunks = (df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size))
     else:
         raise ValueError("Invalid file type. Only CSV or Excel allowed.")
 
-    # Clean column names
-    df.columns = [str(c).strip().lower() for c in df.columns]
-    df = df.loc[:, df.columns.notna()].copy()
+    for df in chunks:
+        # Clean column names
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        df = df.loc[:, ~df.columns.duplicated()]
+
+        # KEEP only valid columns, ADD missing ones as NULL, in DB order
+        df = df.reindex(columns=STUDENT_HEADERS)
 
-    # ----- ALL REQUIRED DB COLUMNS -----
-    headers = [
-        'registration_number', 'name', 'email', 'phone', 'course', 'section',
-        'specialization', 'semester', 'backlogs', 'status', 'cgpa', 'roll_no',
-        'department', 'marks_10th', 'marks_12th', 'current_stage'
-    ]
+        # Column-wise conversion to native Python types (NaN -> None)
+        df = df.astype(object).where(df.notna(), None)
 
-    # KEEP only valid columns from file
-    df = df[[c for c in df.columns if c in headers]].copy()
+        # Ensure student has at least a name — minimal requirement
+        yield df[df['name'].notna()]
 
-    # ADD missing columns with NULL
-    for h in headers:
-        if h not in df.columns:
-            df[h] = None
 
-    # Arrange columns in correct order
-    df = df[headers]
+def row_error_code(e):
+    """
+    Short code for a rejected row. Job results are shown in the browser, so row
+    errors carry the row index and this code, never the row's values (driver
+    messages such as "Duplicate entry '<reg no>'" quote them).
+    """
+    errno = getattr(e, 'errno', None)
+    if errno == 1062:
+        return 'duplicate'
+    return f'db_error_{errno}' if errno else type(e).__name__
 
-    # Convert values to native Python types
-    df = df.applymap(_to_py)
 
-    # Ensure student has at least a name — minimal requirement
-    df = df[df['name'].notna()]
+def _insert_student_batch(cursor, conn, batch, errors):
+    """
+    Insert one batch with a single multi-row statement.
+    If the batch is rejected, retry row by row so only the bad rows are reported.
+    Returns the number of rows inserted.
+    """
+    values = [v for _, v in batch]
+    try:
+        cursor.executemany(STUDENT_INSERT_SQL, values)
+        conn.commit()
+        return max(cursor.rowcount, 0)
+    except Exception:
+        conn.rollback()
 
-    cursor, conn = get_cursor()
     inserted = 0
-    errors = []
-    student_list_for_applications = []
+    for idx, row in batch:
+        try:
+            cursor.execute(STUDENT_INSERT_SQL, row)
+            inserted += max(cursor.rowcount, 0)
+        except Exception as e:
+            errors.append({'row_index': idx, 'error': row_error_code(e)})
+    conn.commit()
+    return inserted
+
+
+def count_data_rows(file_path):
+    """
+    Cheap estimate of the number of data rows in a CSV/Excel file (header excluded),
+    used for progress / ETA. Returns None when it can't be known up front.
+    """
+    ext = file_path.rsplit('.', 1)[-1].lower()
+    try:
+        if ext == 'csv':
+            with open(file_path, 'rb') as f:
+                lines = sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+            return max(lines - 1, 0)
+        if ext == 'xlsx':
+            from openpyxl import load_workbook
+            wb = load_workbook(file_path, read_only=True)
+            try:
+                max_row = wb.active.max_row
+            finally:
+                wb.close()
+            return max(max_row - 1, 0) if max_row else None
+    except Exception as e:
+        logging.warning(f"Could not count rows in {file_path}: {e}")
+    return None
 
-    # SQL Insert Query
-    insert_sql = """
-        INSERT IGNORE INTO students (
-            registration_number, name, email, phone, course, section, specialization,
-            semester, backlogs, status, cgpa, roll_no, department,
-            marks_10th, marks_12th, current_stage
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+
+def bulk_add_students(file_path, batch_size=1000, chunk_size=5000, progress=None):
+    """
+    Bulk add students from Excel or CSV file.
+    The file is streamed in chunks of chunk_size rows and written in multi-row
+    batches of batch_size, so memory stays bounded for large cohort files.
+    progress: optional jobs.JobProgress, updated after every chunk.
+    Rejected rows are reported in 'errors'; anything else (unreadable file, lost
+    connection) raises, so the caller / job sees the failure.
+    Returns dictionary: {'inserted': int, 'failed': int, 'errors': list, 'applications_created': int}
     """
+    inserted = 0
+    errors = []
+    applications = 0
+
+    if progress is not None:
+        progress.set_total(count_data_rows(file_path))
 
     try:
-        for idx, row in df.iterrows():
-            values = tuple(row[h] for h in headers)
+        with db.cursor(dictionary=False) as (cursor, conn):
+            for df in iter_student_chunks(file_path, chunk_size):
+                first_error = len(errors)
+                batch = []
+                for idx, row in zip(df.index, df.itertuples(index=False, name=None)):
+                    # Optional strict check for name (blank strings survive the notna() filter)
+                    if not str(row[1]).strip():
+                        errors.append({'row_index': idx, 'error': 'missing_name'})
+                        continue
+                    batch.append((idx, row))
 
-            # Optional strict check for registration_number
-            # Remove this check if you want NULL allowed for reg_no also
-            if not row.get('name'):
-                errors.append({'row_index': idx, 'values': values, 'error': 'Missing name'})
-                continue
+                    if len(batch) >= batch_size:
+                        inserted += _insert_student_batch(cursor, conn, batch, errors)
+                        batch = []
 
-            try:
-                cursor.execute(insert_sql, values)
-                inserted += 1
-                student_list_for_applications.append(dict(row))
+                if batch:
+                    inserted += _insert_student_batch(cursor, conn, batch, errors)
 
-                # Commit in batches
-                if inserted % batch_size == 0:
-                    conn.commit()
+                # Add this chunk's students to the applications table
+                failed_idx = [e['row_index'] for e in errors[first_error:]]
+                accepted = df.drop(index=failed_idx)
+                applications += add_students_to_applications(
+                    accepted['registration_number'].tolist(), cursor, conn=conn
+                )
 
-            except Exception as e:
-                errors.append({'row_index': idx, 'values': values, 'error': str(e)})
+                if progress is not None and not df.empty:
+                    progress.update(rows_parsed=int(df.index.max()) + 1,
+                                    inserted=inserted, failed=len(errors))
+    finally:
+        # batches commit as they go, so a failure part-way still changed data
+        if inserted or applications:
+            invalidate_profile("student")
+            mark_data_changed()
 
-        conn.commit()
+    logging.info(f"Inserted: {inserted}, Failed: {len(errors)}, Applications: {applications}")
+
+    return {'inserted': inserted, 'failed': len(errors), 'errors': errors,
+            'applications_created': applications}
+
+
+# ----- ROUND RESULTS (company_shortlist) -----
+ROUND_REQUIRED_COLUMNS = ['registration_number', 'student_name', 'email', 'branch', 'year']
+
+
+ROUND_COLUMNS = ['registration_number', 'student_name', 'email', 'branch', 'year', 'status']
+
+
+def read_round_results(file_path):
+    """
+    Read a round result sheet into a clean DataFrame with ROUND_COLUMNS
+    (stripped registration numbers, NaN -> None, default status 'Passed').
+    Duplicate registration numbers keep their last row.
+    Returns (df, errors).
+    """
+    # 📥 Read file (all shortlist columns are text, so keep "0123" / "2024" as written)
+    if file_path.lower().endswith(('xls', 'xlsx')):
+        df = pd.read_excel(file_path, dtype=str)
+    else:
+        df = pd.read_csv(file_path, dtype=str)
+
+    # Normalize columns
+    df.columns = [str(c).strip().lower() for c in df.columns]
+
+    for col in ROUND_REQUIRED_COLUMNS:
+        if col not in df.columns:
+            raise ValueError(f"Missing column: {col}")
+
+    df = df.reindex(columns=ROUND_COLUMNS)
+    df['status'] = df['status'].fillna('Passed')
+    df = df.astype(object).where(df.notna(), None)
+    df['registration_number'] = df['registration_number'].map(lambda r: str(r).strip() if r is not None else '')
+
+    errors = [{'row_index': idx, 'error': 'missing_registration_number'}
+              for idx in df.index[df['registration_number'] == '']]
+    df = df[df['registration_number'] != '']
+
+    dupes = df['registration_number'].duplicated(keep='last')
+    errors += [{'row_index': idx, 'error': 'duplicate_registration_number'}   # later row kept
+               for idx in df.index[dupes]]
+    return df[~dupes], errors
 
+
+def cache_round_file(cursor, file_id, df, batch_size=1000):
+    """
+    Store the parsed rows of an uploaded round file in round_file_rows (replacing any
+    earlier copy) so tutors can page through it without re-reading the file.
+    Returns the number of rows cached.
+    """
+    rows = [(file_id, i + 1, *r) for i, r in enumerate(df.itertuples(index=False, name=None))]
+    cursor.execute("DELETE FROM round_file_rows WHERE file_id=%s", (file_id,))
+    for i in range(0, len(rows), batch_size):
+        cursor.executemany("""
+            INSERT INTO round_file_rows
+            (file_id, line_no, registration_number, student_name, email, branch, year, status)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+        """, rows[i:i + batch_size])
+    cursor.execute("UPDATE uploaded_round_files SET row_count=%s WHERE id=%s", (len(rows), file_id))
+    return len(rows)
+
+
+def import_round_results(file_path, company_id, round_number, batch_size=1000, progress=None,
+                         file_id=None):
+    """
+    Replace the shortlist of one company round with the rows of a CSV/Excel file.
+
+    Rows are first bulk-loaded into company_shortlist_staging (multi-row inserts,
+    no locks on the live table), then swapped in with DELETE + INSERT ... SELECT
+    in one short transaction, so readers see either the old or the new round.
+    With file_id (an uploaded_round_files row) the parsed rows are cached in the
+    same transaction; if the import fails, that record and the file are removed so
+    tutors are never shown a round that was not loaded.
+    Returns dictionary: {'inserted': int, 'failed': int, 'errors': list}
+    """
+    try:
+        return _import_round_results(file_path, company_id, round_number, batch_size, progress, file_id)
+    except Exception:
+        if file_id is not None:
+            discard_round_file(file_id, file_path)
+        raise
+
+
+def discard_round_file(file_id, file_path):
+    """Drop an uploaded round file whose import failed (its cached rows go with it)."""
+    try:
+        with db.cursor(dictionary=False) as (cursor, conn):
+            cursor.execute("DELETE FROM uploaded_round_files WHERE id=%s", (file_id,))
+        if os.path.exists(file_path):
+            os.remove(file_path)
     except Exception as e:
-        logging.error(f"Bulk insert failed: {e}")
+        logging.error(f"Could not discard round file #{file_id}: {e}")
 
-    finally:
-        cursor.close()
-        conn.close()
 
-    logging.info(f"Inserted: {inserted}, Failed: {len(errors)}")
+def _import_round_results(file_path, company_id, round_number, batch_size, progress, file_id):
+    df, errors = read_round_results(file_path)
+    if progress is not None:
+        progress.set_total(len(df) + len(errors))
+
+    load_id = uuid.uuid4().hex
+    staging_sql = """
+        INSERT INTO company_shortlist_staging
+        (load_id, company_id, round_number, registration_number,
+         student_name, email, branch, year, status)
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    """
+    rows = [(load_id, company_id, round_number, *r)
+            for r in df.itertuples(index=False, name=None)]
+
+    with db.cursor(dictionary=False) as (cursor, conn):
+        try:
+            # 1) batched load into staging
+            for i in range(0, len(rows), batch_size):
+                cursor.executemany(staging_sql, rows[i:i + batch_size])
+                if progress is not None:
+                    progress.update(rows_parsed=min(i + batch_size, len(rows)))
+
+            # 2) atomic swap into the live round
+            conn.start_transaction()
+            cursor.execute("""
+                DELETE FROM company_shortlist
+                WHERE company_id=%s AND round_number=%s
+            """, (company_id, round_number))
+            cursor.execute("""
+                INSERT INTO company_shortlist
+                (company_id, round_number, registration_number,
+                 student_name, email, branch, year, status)
+                SELECT company_id, round_number, registration_number,
+                       student_name, email, branch, year, status
+                FROM company_shortlist_staging
+                WHERE load_id=%s
+            """, (load_id,))
+            inserted = cursor.rowcount
+
+            # keep the parsed file for in-browser viewing (no pandas per view); cached in
+            # the swap transaction, so a file only shows rows once the round is live
+            if file_id is not None:
+                cache_round_file(cursor, file_id, df, batch_size)
+            conn.commit()
+        finally:
+            # 3) drop this load's staging rows whether or not the swap happened. A failed
+            # swap is rolled back first, or the rollback would undo the cleanup with it.
+            if conn.in_transaction:
+                conn.rollback()
+            cursor.execute("DELETE FROM company_shortlist_staging WHERE load_id=%s", (load_id,))
+            conn.commit()
 
-    # Add students to applications table
-    if student_list_for_applications:
-        add_students_to_applications(student_list_for_applications)
+    mark_data_changed()
+    if progress is not None:
+        progress.update(inserted=inserted, failed=len(errors))
 
     return {'inserted': inserted, 'failed': len(errors), 'errors': errors}